@@ -0,0 +1,83 @@
+"""
+Import-time benchmark of dalign. 
+
+Measures the time `import dalign` adds on top of importing numpy and pandas, and checks that 
+the plotting and NLP dependencies are not imported eagerly. Exits with status 1 if the budget 
+is exceeded, so it can guard the import time in CI.
+
+    python benchmarks/import_time.py --budget 0.3 --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'sklearn', 'scipy', 'nltk']
+
+def child_env():
+    """
+    Get the environment for the child interpreters, with the repository root on PYTHONPATH.
+
+    Returns
+    -------
+     : dict
+        The environment variables.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+
+def measure(code, repeat):
+    """
+    Run code in fresh interpreters and return the best wall time reported by the child.
+
+    Parameters
+    ----------
+    code : str
+        The statements to time.
+    repeat : int
+        The number of fresh interpreters to run.
+
+    Returns
+    -------
+     : float
+        The best time in seconds.
+    """
+    script = f"import time\nstart = time.perf_counter()\n{code}\nprint(time.perf_counter() - start)"
+    times = [float(subprocess.check_output([sys.executable, '-c', script], env=child_env())) for _ in range(repeat)]
+    return min(times)
+
+def eager_modules():
+    """
+    Get the heavy dependencies that are imported by `import dalign`.
+
+    Returns
+    -------
+     : list
+        The names of the heavy modules found in sys.modules after the import.
+    """
+    code = f"import sys, dalign\nprint(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    return subprocess.check_output([sys.executable, '-c', code], env=child_env()).decode().split()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget', type=float, default=0.3, 
+                        help='maximum seconds `import dalign` may add on top of numpy and pandas')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    base = measure("import numpy, pandas", args.repeat)
+    total = measure("import numpy, pandas\nimport dalign", args.repeat)
+    eager = eager_modules()
+    result = {'pandas_numpy_s': base, 'dalign_total_s': total, 'dalign_own_s': total-base, 
+              'budget_s': args.budget, 'eager_heavy_modules': eager}
+    print(json.dumps(result, indent=2))
+    if eager:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(eager)}")
+        sys.exit(1)
+    if total-base>args.budget:
+        print(f"FAIL: import dalign adds {total-base:.3f}s, budget is {args.budget:.3f}s")
+        sys.exit(1)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,293 @@
+"""
+Benchmark suite of the public functions of dalign.missing, dalign.store, dalign.time, dalign.utility and
+dalign.verify on synthetic data.
+
+Each case is timed (best of --repeat runs) and its peak traced memory is measured in a separate
+run, for every size in --rows. The results are written as JSON. With --baseline, the results are
+compared against a saved result file and the script exits with status 1 if a case got slower or
+used more memory than the baseline times --threshold, so it can gate upgrades in CI.
+
+    python benchmarks/suite.py --rows 10000 100000 --output results.json
+    python benchmarks/suite.py --rows 10000 100000 --baseline results.json --threshold 1.5
+
+benchmarks/baseline.json is the result of the default run, to compare against with
+--baseline benchmarks/baseline.json. Timings only compare on the same machine, so regenerate
+it with --output on the machine that runs the comparison.
+"""
+import argparse
+import atexit
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import dalign
+from dalign import missing, store, utility, verify
+from dalign import time as dtime
+
+WORDS = ['alpha', 'beta', 'gamma', 'delta', 'omega', 'sigma', 'kappa', 'theta', 'inc', 'corp', 'ltd', 'llc']
+
+def make_frame(rows, columns=8, null_ratio=0.1, cardinality=100, density=1000, seed=0):
+    """
+    Generate a synthetic DataFrame with numerical, categorical and datetime columns.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows.
+    columns : int, default 8
+        The number of numerical columns, named num_0, num_1, ...
+    null_ratio : float, default 0.1
+        The ratio of missing values in the numerical and categorical columns.
+    cardinality : int, default 100
+        The number of distinct values of the categorical columns.
+    density : float, default 1000
+        The number of rows per day of the datetime column 'time', sorted in time order.
+    seed : int, default 0
+        The seed of the generator.
+
+    Returns
+    -------
+     : DataFrame
+        The DataFrame with the columns num_*, 'cat' (short codes), 'name' (multi-word names
+        for similarity matching), 'time' (datetime) and 'date' (strings that contain a date).
+    """
+    rng = np.random.default_rng(seed)
+    data = {f'num_{i}': rng.normal(i, 1+i, rows) for i in range(columns)}
+    codes = rng.integers(0, cardinality, rows)
+    data['cat'] = np.array([f'c{i}' for i in range(cardinality)], dtype=object)[codes]
+    names = np.array([' '.join(rng.choice(WORDS, 2)) + rng.choice(['', '.', ' Inc'])
+                      for _ in range(cardinality)], dtype=object)
+    data['name'] = names[codes]
+    seconds = np.sort(rng.uniform(0, rows/density*86400, rows))
+    data['time'] = pd.Timestamp('2020-01-01') + pd.to_timedelta(seconds, unit='s')
+    df = pd.DataFrame(data)
+    df['date'] = 'at ' + df['time'].dt.strftime('%Y-%m-%d') + ' by x'
+    for column in [f'num_{i}' for i in range(columns)] + ['cat', 'name']:
+        df.loc[rng.random(rows)<null_ratio, column] = np.nan
+    return df
+
+# the directory of the files written for the cases that read from disk, removed at exit
+WORKDIR = tempfile.mkdtemp(prefix='dalign-bench-')
+atexit.register(shutil.rmtree, WORKDIR, ignore_errors=True)
+# the files written for each frame as {(id of the frame, kind): path}
+FILES = {}
+
+def frame_file(df, kind):
+    """
+    Write a frame to disk once, so the cases that read from disk do not time the writing.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The input frame.
+    kind : str
+        'csv' for a CSV file, 'store' for a directory written by store.materialize.
+
+    Returns
+    -------
+     : str
+        The path of the file or directory.
+    """
+    key = (id(df), kind)
+    if key not in FILES:
+        path = os.path.join(WORKDIR, f'{len(FILES)}.{kind}')
+        if kind=='csv':
+            df.to_csv(path, index=False)
+        else:
+            store.materialize(df, path, 'time')
+        FILES[key] = path
+    return FILES[key]
+
+def middle(df, share=0.5):
+    """
+    Get the interval of the datetime column 'time' that holds the middle share of the rows.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The input frame.
+    share : float, default 0.5
+        The share of the rows in the interval.
+
+    Returns
+    -------
+     : tuple
+        The start and end of the interval as strings.
+    """
+    times = df['time']
+    return str(times.iloc[int(len(df)*(1-share)/2)]), str(times.iloc[int(len(df)*(1+share)/2)-1])
+
+# the cases as (module, name, function of the frame), the frame is copied for cases that modify it
+CASES = [
+    ('missing', 'missing_val_info', lambda df: missing.missing_val_info(df)),
+    ('missing', 'handle_missing_drop', lambda df: missing.handle_missing(df, 'drop')),
+    ('missing', 'handle_missing_forward', lambda df: missing.handle_missing(df, 'forward')),
+    ('missing', 'impute_mean', lambda df: missing.impute(df, 'num_0', 'mean')),
+    ('missing', 'impute_median_all', lambda df: missing.impute(df, [c for c in df.columns if c.startswith('num_')], 'median')),
+    ('missing', 'rolling_impute_mean', lambda df: missing.rolling_impute(df, 'num_0', 'mean')),
+    ('missing', 'rolling_impute_median', lambda df: missing.rolling_impute(df, 'num_0', 'median')),
+    ('missing', 'rolling_impute_mood', lambda df: missing.rolling_impute(df, 'num_0', 'mood')),
+    ('missing', 'imputer_group_mean', lambda df: missing.Imputer(method='mean', by='cat').fit_transform(df)),
+    ('missing', 'imputer_time', lambda df: missing.Imputer(method='time', time_col='time', limit=5).fit_transform(df)),
+    ('time', 'parse_date', lambda df: dtime.parse_date(df.copy(), 'date')),
+    ('time', 'agg_time', lambda df: dtime.agg_time(df, 'num_0', 'time', unit='day_of_year')),
+    ('time', 'agg_time_quantile', lambda df: dtime.agg_time(df, 'num_0', 'time', unit='hour', how='quantile')),
+    ('time', 'agg_time_along', lambda df: dtime.agg_time_along(df, 'num_0', 'time', *middle(df))),
+    ('time', 'time_dist', lambda df: dtime.time_dist(df, 'time', unit='hour')),
+    ('time', 'time_dist_along', lambda df: dtime.time_dist_along(df, 'num_0', 'time', unit='hour')),
+    ('store', 'materialize', lambda df: store.materialize(df, os.path.join(WORKDIR, f'materialize_{len(df)}'), 'time')),
+    ('store', 'time_store_query', lambda df: store.open_store(frame_file(df, 'store')).query(*middle(df))),
+    ('utility', 'read_file', lambda df: utility.read_file(frame_file(df, 'csv'))),
+    ('utility', 'clean_strings', lambda df: utility.clean_strings(df['name'])),
+    ('utility', 'com_sim_cat_adjacent', lambda df: utility.com_sim_cat(df.copy(), 'name')),
+    ('utility', 'com_sim_cat_cluster', lambda df: utility.com_sim_cat(df.copy(), 'name', mode='cluster')),
+    ('utility', 'comp_key', lambda df: utility.comp_key(df.copy(), 'cat', 'name', 'key')),
+    ('utility', 'comp_key_integer', lambda df: utility.comp_key(df.copy(), 'cat', ['name', 'time'], 'key', mode='integer')),
+    ('utility', 'comp_key_hash', lambda df: utility.comp_key(df.copy(), 'cat', ['name', 'time'], 'key', mode='hash')),
+    ('utility', 'compact', lambda df: utility.compact(df)),
+    ('verify', 'num_var_info', lambda df: verify.num_var_info(df)),
+    ('verify', 'show_outlier', lambda df: verify.show_outlier(df, 'num_1')),
+    ('verify', 'cat_var_type_counts', lambda df: verify.cat_var_type_counts(df)),
+    ('verify', 'cat_counts_sort', lambda df: verify.cat_counts_sort(df, 'cat', 0, 10)),
+    ('verify', 'num_var_dist', lambda df: verify.num_var_dist(df[['num_0', 'num_1']])),
+    ('verify', 'cat_var_vis', lambda df: verify.cat_var_vis(df[['cat']], max_category_num=200)),
+]
+
+def run(func, df):
+    """
+    Call a case quietly: its printed output and warnings are discarded and its figures closed.
+
+    Parameters
+    ----------
+    func : function
+        The case function.
+    df : DataFrame
+        The input frame.
+    """
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        func(df)
+    if 'matplotlib.pyplot' in sys.modules:
+        sys.modules['matplotlib.pyplot'].close('all')
+
+def measure(func, df, repeat):
+    """
+    Time a case and measure its peak memory.
+
+    Parameters
+    ----------
+    func : function
+        The case function.
+    df : DataFrame
+        The input frame.
+    repeat : int
+        The number of timed runs.
+
+    Returns
+    -------
+     : tuple
+        The best time in seconds and the peak traced memory in MB of a separate run.
+    """
+    run(func, df)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(func, df)
+        times.append(time.perf_counter()-start)
+    tracemalloc.start()
+    try:
+        run(func, df)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(times), peak/2**20
+
+def compare(results, baseline, threshold, min_seconds):
+    """
+    Compare results against a baseline.
+
+    Parameters
+    ----------
+    results : list
+        The result records of this run.
+    baseline : list
+        The result records of the baseline run.
+    threshold : float
+        The largest allowed ratio of time or memory to the baseline.
+    min_seconds : float
+        Cases faster than this in both runs are not compared on time, they are dominated by noise.
+
+    Returns
+    -------
+     : list
+        The failure messages, empty if every case is within the threshold.
+    """
+    base = {(record['case'], record['rows']): record for record in baseline}
+    failures = []
+    for record in results:
+        old = base.get((record['case'], record['rows']))
+        if old is None:
+            continue
+        if max(record['seconds'], old['seconds'])>=min_seconds and record['seconds']>threshold*old['seconds']:
+            failures.append(f"{record['case']} rows={record['rows']}: {record['seconds']:.4f}s vs baseline {old['seconds']:.4f}s")
+        if record['peak_mb']>threshold*old['peak_mb'] and record['peak_mb']-old['peak_mb']>1:
+            failures.append(f"{record['case']} rows={record['rows']}: {record['peak_mb']:.1f}MB vs baseline {old['peak_mb']:.1f}MB")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--columns', type=int, default=8)
+    parser.add_argument('--null-ratio', type=float, default=0.1)
+    parser.add_argument('--cardinality', type=int, default=100)
+    parser.add_argument('--density', type=float, default=1000, help='rows per day of the datetime column')
+    parser.add_argument('--cases', nargs='*', default=None, help='only run the cases whose name contains one of these')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None, help='file to write the results to')
+    parser.add_argument('--baseline', default=None, help='result file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='largest allowed ratio of time or memory to the baseline')
+    parser.add_argument('--min-seconds', type=float, default=0.005,
+                        help='cases faster than this are not compared on time')
+    args = parser.parse_args()
+
+    cases = [case for case in CASES if args.cases is None
+             or any(part in f'{case[0]}.{case[1]}' for part in args.cases)]
+    results = []
+    for rows in args.rows:
+        df = make_frame(rows, args.columns, args.null_ratio, args.cardinality, args.density)
+        for module, name, func in cases:
+            seconds, peak = measure(func, df, args.repeat)
+            results.append({'case': f'{module}.{name}', 'rows': rows, 'seconds': seconds, 'peak_mb': peak})
+            print(f"{module+'.'+name:<36} rows={rows:<9} {seconds:10.4f}s {peak:10.1f}MB")
+    report = {'meta': {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                       'dalign': getattr(dalign, '__version__', None), 'columns': args.columns,
+                       'null_ratio': args.null_ratio, 'cardinality': args.cardinality, 'density': args.density},
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            failures = compare(results, json.load(file)['results'], args.threshold, args.min_seconds)
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        if failures:
+            sys.exit(1)
+
+if __name__=='__main__':
+    main()
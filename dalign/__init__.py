@@ -1,3 +1,3 @@
 from . import (
-    missing, time, utility, verify
-)
\ No newline at end of file
+    cache, instrument, missing, outlier, profile, render, report, sketch, store, stream, time, utility, verify
+)
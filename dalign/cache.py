@@ -0,0 +1,400 @@
+import copy
+import ctypes
+import functools
+import hashlib
+import inspect
+import marshal
+import os
+import pickle
+import sys
+import weakref
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# whether the results are memoized, off by default
+enabled = False
+# the largest total size of the results kept in memory, in bytes
+max_bytes = 2**28
+# the directory of the on-disk backend, None to keep the results in memory only
+directory = None
+# the results in memory as key: (result, size), least recently used first
+entries = OrderedDict()
+# the total size of the results in memory, in bytes
+used = 0
+# the number of calls answered from the cache and computed
+stats = {'hits': 0, 'misses': 0}
+
+def enable(memory=2**28, path=None):
+    """
+    Start memoizing the results of the cached functions.
+
+    Parameters
+    ----------
+    memory : int, default 2**28
+        The largest total size of the results kept in memory, in bytes. The least recently
+        used results are dropped beyond it.
+    path : str or path object, default None
+        The directory of the on-disk backend. The results are also written there as pickle files,
+        so they survive the process and are shared by the processes using the same directory.
+    """
+    global enabled, max_bytes, directory
+    enabled = True
+    max_bytes = memory
+    directory = None if path is None else os.fspath(path)
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+    evict()
+
+def disable():
+    """
+    Stop memoizing. The results so far are kept, please refer to clear.
+    """
+    global enabled
+    enabled = False
+
+def clear(disk=False):
+    """
+    Drop the results in memory and reset the hit and miss counts.
+
+    Parameters
+    ----------
+    disk : bool, default False
+        Whether to also delete the result files of the on-disk backend.
+    """
+    global used
+    entries.clear()
+    used = 0
+    stats.update(hits=0, misses=0)
+    if disk and directory is not None:
+        for name in os.listdir(directory):
+            if name.endswith('.pkl'):
+                os.remove(os.path.join(directory, name))
+
+def array_digest(hasher, values, blocksize=2**22):
+    """
+    Feed the memory of a 1-D array to a hash block by block, so a non-contiguous array
+    is never copied as a whole.
+
+    Parameters
+    ----------
+    hasher : hashlib hash
+        The hash to update.
+    values : ndarray
+        The 1-D array of a fixed-size dtype.
+    blocksize : int, default 2**22
+        The number of bytes hashed at a time.
+    """
+    step = max(1, blocksize//max(values.itemsize, 1))
+    for start in range(0, len(values), step):
+        hasher.update(np.ascontiguousarray(values[start:start+step]).view('uint8'))
+
+# the content digests of object arrays as id of the array that owns the memory:
+# {(address, strides, length): (pointer digest, content digest)}, dropped with the owner
+object_digests = {}
+
+def pointer_digest(values):
+    """
+    Hash the memory of a contiguous object array, which holds the addresses of its objects.
+    It changes with any write into the array, at the cost of 8 bytes per row.
+
+    Parameters
+    ----------
+    values : ndarray
+        The contiguous 1-D object array.
+
+    Returns
+    -------
+     : bytes
+        The digest of the addresses.
+    """
+    buffer = (ctypes.c_char*values.nbytes).from_address(values.ctypes.data)
+    return hashlib.sha1(buffer, usedforsecurity=False).digest()
+
+def object_digest(values):
+    """
+    Get the content digest of an object array like strings, through pandas.util.hash_array.
+    The digest is memoized by the memory of the array, and reused while the array is alive and
+    its addresses are unchanged, so an unchanged column is not hashed again. Since the array holds
+    its objects, the same addresses mean the same objects.
+
+    Parameters
+    ----------
+    values : ndarray
+        The 1-D object array.
+
+    Returns
+    -------
+     : str
+        The hexadecimal content digest.
+    """
+    if not values.flags.c_contiguous:
+        hasher = hashlib.sha1(usedforsecurity=False)
+        array_digest(hasher, pd.util.hash_array(values))
+        return hasher.hexdigest()
+    owner = values
+    while isinstance(owner.base, np.ndarray):
+        owner = owner.base
+    place = (values.ctypes.data, values.strides, len(values))
+    pointers = pointer_digest(values)
+    known = object_digests.get(id(owner), {}).get(place)
+    if known is not None and known[0]==pointers:
+        return known[1]
+    hasher = hashlib.sha1(usedforsecurity=False)
+    array_digest(hasher, pd.util.hash_array(values))
+    if id(owner) not in object_digests:
+        object_digests[id(owner)] = {}
+        weakref.finalize(owner, object_digests.pop, id(owner), None)
+    object_digests[id(owner)][place] = (pointers, hasher.hexdigest())
+    return hasher.hexdigest()
+
+def column_digest(values):
+    """
+    Get the digest of the dtype and the values of a column or an index. The memory of a NumPy,
+    categorical or datetime column is hashed as it is, object columns like strings are hashed
+    through object_digest.
+
+    Parameters
+    ----------
+    values : Series or Index
+        The column or index.
+
+    Returns
+    -------
+     : str
+        The hexadecimal digest.
+    """
+    # SHA-1 is used as a fast content hash, not for security
+    hasher = hashlib.sha1(str(values.dtype).encode(), usedforsecurity=False)
+    dtype = values.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind=='O':
+        hasher.update(object_digest(values.to_numpy()).encode())
+    elif isinstance(dtype, np.dtype):
+        array_digest(hasher, values.to_numpy())
+    elif isinstance(dtype, pd.CategoricalDtype):
+        array_digest(hasher, np.asarray(values.array.codes))
+        hasher.update(column_digest(dtype.categories).encode())
+    elif isinstance(dtype, pd.DatetimeTZDtype):
+        array_digest(hasher, pd.DatetimeIndex(values).asi8)
+    else:
+        array_digest(hasher, pd.util.hash_array(values.to_numpy()))
+    return hasher.hexdigest()
+
+def fingerprint(data, columns=None):
+    """
+    Fingerprint the content of a DataFrame or Series: shape, names, dtypes, index and the digest
+    of each column read. Any change of the data read gives a different fingerprint.
+
+    Parameters
+    ----------
+    data : DataFrame or Series
+        The data to fingerprint.
+    columns : list, default None
+        The columns of a DataFrame whose values are read, all of them if None.
+        The names and dtypes of all the columns are part of the fingerprint either way.
+
+    Returns
+    -------
+     : str
+        The fingerprint.
+    """
+    if isinstance(data.index, pd.RangeIndex):
+        index = repr((data.index.start, data.index.stop, data.index.step, data.index.name))
+    else:
+        index = column_digest(data.index)
+    if isinstance(data, pd.Series):
+        return repr(('Series', data.shape, data.name, index, column_digest(data)))
+    positions = range(data.shape[1]) if columns is None else [data.columns.get_loc(column) for column in columns]
+    return repr(('DataFrame', data.shape, list(zip(data.columns, map(str, data.dtypes))), index,
+                 [column_digest(data.iloc[:, i]) for i in positions]))
+
+def param_key(value, columns=None):
+    """
+    Get the part of a cache key for one argument.
+
+    Parameters
+    ----------
+    value : object
+        The argument: a DataFrame, Series, scalar, or list, tuple or dict of them.
+    columns : list, default None
+        The columns read from a DataFrame argument. Please refer to fingerprint.
+
+    Returns
+    -------
+     : str
+        The key part, the fingerprint for a DataFrame or Series.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return fingerprint(value, columns)
+    if value is None or isinstance(value, (bool, int, float, str, np.generic)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return '(' + ','.join(param_key(item) for item in value) + ')'
+    if isinstance(value, dict):
+        return '{' + ','.join(f'{param_key(key)}:{param_key(item)}' for key, item in value.items()) + '}'
+    raise TypeError(f"Cannot fingerprint {type(value).__name__}")
+
+def result_size(value):
+    """
+    Estimate the memory of a result.
+
+    Parameters
+    ----------
+    value : object
+        The result.
+
+    Returns
+    -------
+     : int
+        The estimated size in bytes.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(result_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(result_size(key)+result_size(item) for key, item in value.items())
+    return sys.getsizeof(value)
+
+def evict():
+    """
+    Drop the least recently used results until the results in memory fit in max_bytes.
+    """
+    global used
+    while entries and used>max_bytes:
+        _, (_, size) = entries.popitem(last=False)
+        used -= size
+
+def lookup(key):
+    """
+    Find a result in memory, then on disk.
+
+    Parameters
+    ----------
+    key : str
+        The cache key.
+
+    Returns
+    -------
+     : tuple
+        Whether the result was found, and the result.
+    """
+    if key in entries:
+        entries.move_to_end(key)
+        return True, entries[key][0]
+    if directory is not None:
+        try:
+            with open(os.path.join(directory, key+'.pkl'), 'rb') as file:
+                value = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False, None
+        keep(key, value)
+        return True, value
+    return False, None
+
+def keep(key, value):
+    """
+    Keep a result in memory.
+
+    Parameters
+    ----------
+    key : str
+        The cache key.
+    value : object
+        The result.
+    """
+    global used
+    size = result_size(value)
+    if size>max_bytes:
+        return
+    if key in entries:
+        used -= entries[key][1]
+    entries[key] = (value, size)
+    used += size
+    evict()
+
+def store(key, value):
+    """
+    Keep a result in memory and write it to the on-disk backend.
+
+    Parameters
+    ----------
+    key : str
+        The cache key.
+    value : object
+        The result.
+    """
+    keep(key, value)
+    if directory is not None:
+        # write to a temporary file first, so a reader never sees half a file
+        target = os.path.join(directory, key+'.pkl')
+        temporary = f'{target}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, target)
+
+def cached(func=None, writes=None, ignore=(), reads=None):
+    """
+    Decorator that memoizes a function by the fingerprints of its DataFrame and Series arguments
+    and the values of its other arguments while caching is enabled. A call with an argument that
+    cannot be fingerprinted, e.g. a Profile, is not cached. The results are copied in and out
+    of the cache, so changing a returned result does not change the cache.
+
+    Parameters
+    ----------
+    func : function
+        The function to memoize.
+    writes : tuple, default None
+        The names of the DataFrame parameter and of the parameter with the column name, for a function
+        that overwrites that column of its input. The column is saved with the result and written back
+        on a cache hit.
+    ignore : tuple, default ()
+        The names of the parameters that do not change the result, like n_jobs.
+    reads : function, default None
+        Given the dict of the arguments, returns the columns the function reads from its DataFrame
+        argument. Only these columns are fingerprinted, all the columns if None.
+
+    Returns
+    -------
+     : function
+        The wrapped function.
+    """
+    if func is None:
+        return functools.partial(cached, writes=writes, ignore=ignore, reads=reads)
+    signature = inspect.signature(func)
+    # the whole code object, constants included, is part of the key,
+    # so results on disk are not reused after the function changes
+    name = f"{func.__module__}.{func.__qualname__}:{hashlib.blake2b(marshal.dumps(func.__code__), digest_size=8).hexdigest()}"
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return func(*args, **kwargs)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        try:
+            columns = None if reads is None else list(reads(bound.arguments))
+            params = ','.join(f'{param}={param_key(value, columns)}' for param, value in bound.arguments.items()
+                              if param not in ignore)
+        except TypeError:
+            return func(*args, **kwargs)
+        key = hashlib.blake2b(f'{name}({params})'.encode(), digest_size=16).hexdigest()
+        found, value = lookup(key)
+        if found:
+            stats['hits'] += 1
+            res, written = copy.deepcopy(value)
+            if writes is not None:
+                frame, column = bound.arguments[writes[0]], bound.arguments[writes[1]]
+                frame[column] = written
+            return res
+        stats['misses'] += 1
+        res = func(*args, **kwargs)
+        written = None
+        if writes is not None:
+            written = bound.arguments[writes[0]][bound.arguments[writes[1]]].copy()
+        store(key, copy.deepcopy((res, written)))
+        return res
+    return wrapper
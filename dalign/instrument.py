@@ -0,0 +1,194 @@
+import contextlib
+import functools
+import json
+import time
+import tracemalloc
+import pandas as pd
+
+# whether calls and stages are recorded, off by default
+enabled = False
+# whether peak allocations are traced with tracemalloc, which slows the traced code down
+trace_memory = False
+# whether tracemalloc was started by enable, so disable does not stop the tracing of the caller
+started_tracing = False
+# the records of the finished calls and stages, in order of completion
+records = []
+# the stages that are running, outermost first
+running = []
+
+def enable(memory=False):
+    """
+    Start recording the public function calls and their internal stages.
+
+    Parameters
+    ----------
+    memory : bool, default False
+        Whether to also record the peak allocations with tracemalloc.
+    """
+    global enabled, trace_memory, started_tracing
+    enabled = True
+    trace_memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started_tracing = True
+
+def disable():
+    """
+    Stop recording. The records so far are kept, please refer to reset.
+    tracemalloc is only stopped if enable started it.
+    """
+    global enabled, trace_memory, started_tracing
+    if started_tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    started_tracing = False
+    enabled = False
+    trace_memory = False
+
+def reset():
+    """
+    Drop the records.
+    """
+    records.clear()
+
+def row_count(value):
+    """
+    Get the number of rows of a DataFrame, Series or array argument.
+
+    Parameters
+    ----------
+    value : object
+        The argument.
+
+    Returns
+    -------
+     : int
+        The number of rows, None for other objects.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)) or hasattr(value, 'shape'):
+        return len(value)
+    return None
+
+class Stage:
+    """
+    The context manager that records one call or stage: wall time, CPU time, rows and
+    peak allocation above the memory in use when it started.
+
+    Parameters
+    ----------
+    name : str
+        The name of the call or stage.
+    rows : int, default None
+        The number of rows processed.
+    """
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.path = '/'.join([stage.name for stage in running] + [self.name])
+        if trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            for stage in running:
+                stage.peak = max(stage.peak, peak)
+            tracemalloc.reset_peak()
+            self.base = self.peak = current
+        running.append(self)
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter()-self.wall
+        cpu = time.process_time()-self.cpu
+        running.pop()
+        record = {'name': self.name, 'path': self.path, 'depth': len(running), 'wall_s': wall, 'cpu_s': cpu,
+                  'rows': self.rows, 'peak_bytes': None, 'error': exc[0].__name__ if exc[0] else None}
+        if trace_memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            for stage in running:
+                stage.peak = max(stage.peak, self.peak)
+            record['peak_bytes'] = self.peak-self.base
+        records.append(record)
+        return False
+
+# shared no-op context manager returned while recording is disabled
+null_stage = contextlib.nullcontext()
+
+def stage(name, rows=None):
+    """
+    Record an internal stage of a function, e.g. `with stage('vectorize', len(phrases)):`.
+    Costs one check while recording is disabled.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage.
+    rows : int, default None
+        The number of rows processed by the stage.
+
+    Returns
+    -------
+     : context manager
+        The stage recorder, or a no-op context manager while recording is disabled.
+    """
+    return Stage(name, rows) if enabled else null_stage
+
+def instrumented(func):
+    """
+    Decorator that records every call of a public function while recording is enabled.
+    The rows are taken from the first argument if it is a DataFrame, Series or array.
+
+    Parameters
+    ----------
+    func : function
+        The function to record.
+
+    Returns
+    -------
+     : function
+        The wrapped function.
+    """
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return func(*args, **kwargs)
+        with Stage(name, row_count(args[0]) if args else None):
+            return func(*args, **kwargs)
+    return wrapper
+
+def summary():
+    """
+    Summarize the records by call or stage path.
+
+    Returns
+    -------
+     : DataFrame
+        The number of calls, total and mean wall time, total CPU time, total rows and
+        largest peak allocation of each path, slowest first.
+    """
+    df = pd.DataFrame(records, columns=['name', 'path', 'depth', 'wall_s', 'cpu_s', 'rows', 'peak_bytes', 'error'])
+    res = df.groupby('path', sort=False).agg(calls=('name', 'size'), wall_s=('wall_s', 'sum'),
+                                             mean_wall_s=('wall_s', 'mean'), cpu_s=('cpu_s', 'sum'),
+                                             rows=('rows', 'sum'), peak_bytes=('peak_bytes', 'max'))
+    return res.sort_values('wall_s', ascending=False)
+
+def export(path=None):
+    """
+    Export the records as structured logs, one JSON object per line.
+
+    Parameters
+    ----------
+    path : str or path object, default None
+        The file to append the lines to. If None, the lines are returned.
+
+    Returns
+    -------
+     : str
+        The JSON lines if path is None.
+    """
+    lines = "".join(json.dumps(record)+"\n" for record in records)
+    if path is None:
+        return lines
+    with open(path, 'a') as file:
+        file.write(lines)
@@ -1,7 +1,15 @@
+import heapq
 import numpy as np
 import pandas as pd
+from . import parallel
+from .profile import numeric_columns
+from .utility import is_categorical
+from .instrument import instrumented
+from .cache import cached
 
-def missing_val_info(df):
+@instrumented
+@cached(ignore=('n_jobs',))
+def missing_val_info(df, prof=None, n_jobs=None):
     """    
     Show the DataFrame with the column has missing value as index and the missing counts 
     and missing percent of each column.
@@ -10,17 +18,91 @@ def missing_val_info(df):
     ----------
     df : DataFrame
         The DataFrame to report missing values.
+    prof : Profile or StreamProfile, default None
+        The result of profile.profile(df) or the StreamProfile of df. If provided, the report is read from it 
+        instead of scanning the DataFrame again.
+    n_jobs : int, default None
+        The number of worker processes to count the missing values with. Only the missing values
+        are counted, the numerical columns in shared memory and the categorical columns one by one.
+        Please refer to parallel.resolve_jobs.
 
     Returns
     -------
     res : DataFrame
         The DataFrame that reports missing values.
     """
-    res = pd.DataFrame(np.sum(df.isnull())[np.sum(df.isnull())!=0], columns=["Missing"])
+    if prof is not None:
+        return prof.missing_val_info()
+    if parallel.resolve_jobs(n_jobs)>1:
+        nulls = parallel_nulls(df, n_jobs)
+    else:
+        nulls = df.isnull().sum()
+    res = pd.DataFrame({"Missing": nulls[nulls!=0]})
     res['Missing Percent %'] = res['Missing']/df.shape[0]
     return res
 
-def handle_missing(df, method="drop"):
+def block_nulls(values):
+    """
+    Count the missing values of the columns of a 2-D float array.
+
+    Parameters
+    ----------
+    values : ndarray
+        The 2-D array with one numerical column per array column, missing values as NaN.
+
+    Returns
+    -------
+     : ndarray
+        The missing count of each column.
+    """
+    return np.isnan(values).sum(axis=0)
+
+def column_nulls(series):
+    """
+    Count the missing values of a column.
+
+    Parameters
+    ----------
+    series : Series
+        The column.
+
+    Returns
+    -------
+     : int
+        The missing count.
+    """
+    return int(series.isnull().sum())
+
+def parallel_nulls(df, n_jobs):
+    """
+    Count the missing values of each column of a DataFrame in worker processes, like
+    profile.profile splits the columns but without computing any other statistic.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The DataFrame to count the missing values of.
+    n_jobs : int
+        The number of worker processes. Please refer to parallel.resolve_jobs.
+
+    Returns
+    -------
+     : Series
+        The missing count of each column.
+    """
+    columns = numeric_columns(df)
+    categorical = [column for column in df.columns if is_categorical(df[column].dtype)]
+    nulls = {}
+    if columns:
+        nulls.update(zip(columns, np.concatenate(parallel.map_shared(block_nulls, df, columns, n_jobs))))
+    if categorical:
+        nulls.update(zip(categorical, parallel.map_columns(column_nulls, df, categorical, n_jobs)))
+    others = [column for column in df.columns if column not in nulls]
+    nulls.update(df[others].isnull().sum().to_dict())
+    return pd.Series([nulls[column] for column in df.columns], index=df.columns, dtype='int64')
+
+@instrumented
+def handle_missing(df, method="drop", inplace=False):
     """
     Handle the missing value in the DataFrame with the method indicated. 
 
@@ -33,50 +115,194 @@ def handle_missing(df, method="drop"):
         'drop' : drop all the rows that contains NaN value.
         'forward' : replace NaN value with the last value in the column.
         'backward' : replace NaN value with the next value in the column.
+    inplace : bool, default False
+        Whether to modify df instead of returning a new DataFrame. 'forward' and 'backward'
+        fill the column buffers in place, while 'drop' still rebuilds the kept rows.
 
     Returns
     -------
      : DataFrame
-        The DataFrame with all NaN values handled.
+        The DataFrame with all NaN values handled, None if inplace is True.
     """
     if method=="drop":
-        return df.dropna()
+        return df.dropna(inplace=inplace)
     elif method=="forward":
-        return df.fillna(method='ffill')
+        return df.ffill(inplace=inplace)
     elif method=="backward":
-        return df.fillna(method='bfill')
+        return df.bfill(inplace=inplace)
+    else:
+        raise ValueError("Wrong Parameter")
 
-def impute(df, column, method="mean"):
+def fill_value(series, method="mean"):
+    """
+    Compute the value to impute the NaN values of a column with. Please refer to impute.
+
+    Parameters
+    ----------
+    series : Series
+        The column.
+    method : str
+        'mean', 'median' or 'mood'.
+
+    Returns
+    -------
+     : object
+        The fill value.
+    """
+    if method=="mean":
+        return np.nanmean(series.to_numpy(dtype=float, na_value=np.nan))
+    elif method=="median":
+        return np.nanmedian(series.to_numpy(dtype=float, na_value=np.nan))
+    elif method=="mood":
+        return series.value_counts().index[0]
+    raise ValueError("Wrong Parameter")
+
+@instrumented
+def impute(df, column, method="mean", inplace=False):
     """    
     Given a numeric column from a data frame, impute all the NaN value in the column with the indicated method.
+    The null mask of each column is computed once and only the masked positions are written.
 
     Parameters
     ----------
     df : DataFrame
         The DataFrame contains numeric column with NaN values.
-    column : str
-        The column name of the numerical column to impute.
+    column : str or list
+        The column name of the numerical column to impute, or a list of column names.
     method : str
         The method to impute the NaN value to. The set of potential methods is:
         'mean' : Replace all the NaN value with the mean value of the column.
         'median' : Replace all the NaN value with the median value of the column.
         'mood' : Replace all the NaN value with the mood value of the column.
+    inplace : bool, default False
+        Whether to write the values into the columns of df, without copying any column.
 
     Returns
     -------
-     : Series
-        The Series with all the NaN values imputed.
+     : Series or DataFrame
+        The Series with all the NaN values imputed, or the DataFrame of the imputed columns 
+        if column is a list. None if inplace is True.
     """
+    columns = list(column) if pd.api.types.is_list_like(column) else [column]
+    res = {}
+    for name in columns:
+        series = df[name]
+        nulls = series.isnull().to_numpy()
+        value = fill_value(series, method)
+        if inplace:
+            if nulls.any():
+                df.loc[nulls, name] = value
+            continue
+        res[name] = series.copy()
+        if nulls.any():
+            res[name].loc[nulls] = value
+    if inplace:
+        return None
+    return pd.DataFrame(res, index=df.index) if pd.api.types.is_list_like(column) else res[column]
+
+def expanding_fill_values(values, method="mean"):
+    """
+    For every NaN in a 1-D array, compute the statistic of all the non-NaN values prior to it
+    in a single pass over the array.
+
+    Parameters
+    ----------
+    values : array_like
+        The 1-D numeric array contains NaN values.
+    method : str
+        The statistic to compute. The set of potential methods is:
+        'mean' : running sum and count of the prior values.
+        'median' : running median of the prior values kept by a max-heap and a min-heap.
+        'mood' : running frequency table of the prior values, ties go to the value seen first.
+
+    Returns
+    -------
+    fills : ndarray
+        The statistic for each NaN position, in positional order. NaN if no value precedes it.
+    """
+    values = np.asarray(values, dtype=float)
+    nulls = np.isnan(values)
+    positions = np.flatnonzero(nulls)
     if method=="mean":
-        return df[column].replace(np.nan, np.nanmean(df[column]))
-    elif method=="median":
-        return df[column].replace(np.nan, np.nanmedian(df[column]))
+        # counts and sums of the non-NaN values before each position
+        counts = np.cumsum(~nulls) - ~nulls
+        sums = np.cumsum(np.where(nulls, 0, values))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts[positions]>0, sums[positions]/counts[positions], np.nan)
+    fills = np.full(len(positions), np.nan)
+    if len(positions)==0:
+        return fills
+    # only the values before the last NaN contribute to any fill value
+    prior = values[:positions[-1]]
+    k = 0
+    if method=="median":
+        # lower half as a max-heap (negated), upper half as a min-heap
+        lower, upper = [], []
+        for i, value in enumerate(prior):
+            while k<len(positions) and positions[k]==i:
+                fills[k] = median_of_heaps(lower, upper)
+                k += 1
+            if nulls[i]:
+                continue
+            if lower and value>-lower[0]:
+                heapq.heappush(upper, value)
+            else:
+                heapq.heappush(lower, -value)
+            if len(lower)>len(upper)+1:
+                heapq.heappush(upper, -heapq.heappop(lower))
+            elif len(upper)>len(lower):
+                heapq.heappush(lower, -heapq.heappop(upper))
+        while k<len(positions):
+            fills[k] = median_of_heaps(lower, upper)
+            k += 1
     elif method=="mood":
-        return df[column].replace(np.nan, df[column].value_counts().index[0])
+        counts = {}
+        first_seen = {}
+        best = np.nan
+        for i, value in enumerate(prior):
+            while k<len(positions) and positions[k]==i:
+                fills[k] = best
+                k += 1
+            if nulls[i]:
+                continue
+            counts[value] = counts.get(value, 0) + 1
+            first_seen.setdefault(value, i)
+            if (best!=best or counts[value]>counts[best]
+                or (counts[value]==counts[best] and first_seen[value]<first_seen[best])):
+                best = value
+        fills[k:] = best
+    else:
+        raise ValueError("Wrong Parameter")
+    return fills
+
+def median_of_heaps(lower, upper):
+    """
+    Get the median of the values kept in a max-heap of the lower half and a min-heap of the upper half.
 
-def rolling_impute(df, column, method="mean"):
+    Parameters
+    ----------
+    lower : list
+        The max-heap of the lower half, with values negated.
+        It holds the same number or one more value than upper.
+    upper : list
+        The min-heap of the upper half.
+
+    Returns
+    -------
+     : float
+        The median value, NaN if both heaps are empty.
+    """
+    if not lower:
+        return np.nan
+    if len(lower)>len(upper):
+        return -lower[0]
+    return (-lower[0]+upper[0])/2
+
+@instrumented
+def rolling_impute(df, column, method="mean", inplace=False):
     """    
     Given a numeric column from a data frame, impute all the NaN value in the column with the indicated method.
+    The statistics are computed by position, so the DataFrame does not need a 0..n index.
 
     Parameters
     ----------
@@ -89,28 +315,345 @@ def rolling_impute(df, column, method="mean"):
         'mean' : Replace all the NaN value with the mean value of all the values prior to the NaN value.
         'median' : Replace all the NaN value with the median value of all the values prior to the NaN value.
         'mood' : Replace all the NaN value with the mood value of all the values prior to the NaN value.
+    inplace : bool, default False
+        Whether to write the imputed values into the column of df instead of returning a new Series.
 
     Returns
     -------
      : Series
-        The Series with all the NaN values imputed.
+        The Series with all the NaN values imputed, None if inplace is True.
+    """
+    values = df[column].to_numpy(dtype=float, na_value=np.nan, copy=not inplace)
+    nulls = np.isnan(values)
+    if inplace:
+        if nulls.any():
+            df.loc[nulls, column] = expanding_fill_values(values, method)
+        return None
+    if not nulls.any():
+        return df[column].copy()
+    values[nulls] = expanding_fill_values(values, method)
+    return pd.Series(values, index=df.index, name=column)
+
+# the methods that fill with a statistic learned by Imputer.fit
+statistic_methods = ("mean", "median", "mood")
+
+def column_statistics(values, codes, groups, method="mean"):
+    """
+    Compute the fill statistic of the columns of a 2-D float array, overall and by group.
+
+    Parameters
+    ----------
+    values : ndarray
+        The 2-D array with one numerical column per array column, missing values as NaN.
+    codes : ndarray
+        The group code of each row, None without groups.
+    groups : int
+        The number of groups.
+    method : str
+        'mean', 'median' or 'mood'. Please refer to impute.
+
+    Returns
+    -------
+     : tuple
+        The statistic of each column, NaN for a column without values, and the 2-D array of
+        the statistic of each group and column, NaN for a group without values in the column.
     """
-    indexes = np.where(df[column].isnull())[0]
+    frame = pd.DataFrame(values)
     if method=="mean":
-        indexes = np.where(df[column].isnull())[0]
-        tmps = [np.nanmean(df.loc[0:index-1, column]) for index in indexes]
-        temp_df = df.copy()
-        temp_df.loc[indexes, column] = tmps
-        return  temp_df[column]
+        overall = frame.mean().to_numpy()
     elif method=="median":
-        indexes = np.where(df[column].isnull())[0]
-        tmps = [np.nanmedian(df.loc[0:index-1, column]) for index in indexes]
-        temp_df = df.copy()
-        temp_df.loc[indexes, column] = tmps
-        return  temp_df[column]
+        overall = frame.median().to_numpy()
     elif method=="mood":
-        indexes = np.where(df[column].isnull())[0]
-        tmps = [df.loc[0:index, column].value_counts().index[0] for index in indexes]
-        temp_df = df.copy()
-        temp_df.loc[indexes, column] = tmps
-        return  temp_df[column]
+        overall = np.array([counts.index[0] if len(counts) else np.nan
+                            for counts in (frame[j].value_counts() for j in frame.columns)], dtype=float)
+    else:
+        raise ValueError("Wrong Parameter")
+    by_group = np.full((groups, values.shape[1]), np.nan)
+    if codes is None or len(codes)==0:
+        return overall, by_group
+    if method in ("mean", "median"):
+        grouped = getattr(frame.groupby(codes), method)()
+        by_group[grouped.index.to_numpy()] = grouped.to_numpy()
+    else:
+        for j in frame.columns:
+            # the counts are sorted by count, so the first row of each group holds its mood value
+            counts = pd.DataFrame({'group': codes, 'value': values[:, j]}).value_counts()
+            first = counts.index.to_frame(index=False).drop_duplicates('group')
+            by_group[first['group'].to_numpy(), j] = first['value'].to_numpy()
+    return overall, by_group
+
+class Imputer:
+    """
+    Imputation engine for many numerical columns at once. The columns are read into one 2-D array
+    and filled with vectorized operations over all the columns and groups together.
+
+    Statistics are learned once by fit and reused by every transform, so the batches of a stream
+    are filled without computing them again. With stream=True, the order-based methods also carry
+    the last observed values and the open gaps of each column and group from one batch to the next,
+    so consecutive batches are filled as if they were one DataFrame, except that a gap at the end
+    of a batch cannot be filled from values that only come in a later batch.
+
+    Parameters
+    ----------
+    columns : list, default None
+        The numerical columns to impute, all the numerical columns given to fit if None.
+    method : str, default 'mean'
+        The method to impute the NaN values with. The set of potential methods is:
+        'mean', 'median', 'mood' : the statistic of the column learned by fit, by group with by.
+        'forward' : the last value before the NaN value.
+        'backward' : the next value after the NaN value.
+        'linear' : linear interpolation between the values around the gap, by row position.
+        'time' : linear interpolation between the values around the gap, by the time of the rows.
+                 Needs time_col. Gaps at the start or end are not filled by interpolation.
+    time_col : str, default None
+        The datetime column, e.g. parsed by time.parse_date. If provided, the rows are filled in time
+        order instead of row order, and the rows with a missing time are left as they are.
+    by : str, default None
+        The key column. If provided, each group of rows with the same key is filled on its own, from
+        its own statistics and neighbours. A group not seen by fit is filled with the overall statistics.
+    limit : int, default None
+        The longest gap, in consecutive NaN values of a column within a group, that is filled.
+        Longer gaps are left as they are. In a stream, the start of a gap at the end of a batch
+        may be filled before the gap turns out to be longer.
+    stream : bool, default False
+        Whether consecutive transform calls are batches of one stream, in order. Please refer to reset.
+    """
+    def __init__(self, columns=None, method="mean", time_col=None, by=None, limit=None, stream=False):
+        if method not in statistic_methods + ("forward", "backward", "linear", "time"):
+            raise ValueError("Wrong Parameter")
+        if method=="time" and time_col is None:
+            raise ValueError("Wrong Parameter")
+        self.columns = None if columns is None else list(columns)
+        self.method = method
+        self.time_col = time_col
+        self.by = by
+        self.limit = limit
+        self.stream = stream
+        self.groups = pd.Index([])
+        self.overall = None
+        self.by_group = None
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the values carried from the previous batches, to start a new stream.
+        """
+        width = 0 if self.columns is None else len(self.columns)
+        self.last_value = np.full((len(self.groups), width), np.nan)
+        self.last_x = np.full((len(self.groups), width), np.nan)
+        self.run = np.zeros((len(self.groups), width), dtype='int64')
+        self.offset = np.zeros(len(self.groups), dtype='int64')
+
+    def group_codes(self, df):
+        """
+        Get the group code of each row, adding the groups not seen before.
+
+        Parameters
+        ----------
+        df : DataFrame
+            The DataFrame that contains the key column.
+
+        Returns
+        -------
+         : ndarray
+            The int64 group codes, all 0 without key column.
+        """
+        if self.by is None:
+            keys, codes = pd.Index([None]), np.zeros(len(df), dtype='int64')
+            if len(self.groups)==0:
+                self.grow(keys)
+            return codes
+        keys = df[self.by]
+        codes = self.groups.get_indexer(keys)
+        if (codes<0).any():
+            self.grow(pd.Index(pd.unique(keys[codes<0])))
+            codes = self.groups.get_indexer(keys)
+        return codes.astype('int64')
+
+    def grow(self, keys):
+        """
+        Add new groups with empty carried values.
+
+        Parameters
+        ----------
+        keys : Index
+            The keys of the new groups.
+        """
+        self.groups = keys if len(self.groups)==0 else self.groups.append(keys)
+        width = self.last_value.shape[1]
+        self.last_value = np.vstack([self.last_value, np.full((len(keys), width), np.nan)])
+        self.last_x = np.vstack([self.last_x, np.full((len(keys), width), np.nan)])
+        self.run = np.vstack([self.run, np.zeros((len(keys), width), dtype='int64')])
+        self.offset = np.concatenate([self.offset, np.zeros(len(keys), dtype='int64')])
+
+    def fit(self, df):
+        """
+        Learn the columns and, for 'mean', 'median' and 'mood', the statistics to fill with.
+
+        Parameters
+        ----------
+        df : DataFrame
+            The DataFrame to learn from.
+
+        Returns
+        -------
+         : Imputer
+            The fitted imputer.
+        """
+        if self.columns is None:
+            self.columns = [column for column in numeric_columns(df) if column!=self.by]
+            self.groups = pd.Index([])
+            self.reset()
+        codes = self.group_codes(df)
+        if self.method in statistic_methods:
+            values = df[self.columns].to_numpy(dtype=float, na_value=np.nan)
+            self.overall, self.by_group = column_statistics(values, codes if self.by is not None else None,
+                                                            len(self.groups), self.method)
+        return self
+
+    def transform(self, df, inplace=False):
+        """
+        Impute the NaN values of the columns.
+
+        Parameters
+        ----------
+        df : DataFrame
+            The DataFrame, or the next batch of the stream, with the columns to impute.
+        inplace : bool, default False
+            Whether to write the imputed values into the columns of df instead of returning a new DataFrame.
+
+        Returns
+        -------
+         : DataFrame
+            The DataFrame with the NaN values imputed, None if inplace is True.
+        """
+        if self.columns is None or (self.method in statistic_methods and self.overall is None):
+            raise ValueError("Imputer is not fitted, please call fit first")
+        if not self.stream:
+            self.reset()
+        # one row per column, so every column is a contiguous array
+        values = df[self.columns].to_numpy(dtype=float, na_value=np.nan).T
+        codes = self.group_codes(df)
+        times = None
+        if self.time_col is not None:
+            if not pd.api.types.is_datetime64_any_dtype(df[self.time_col].dtype):
+                raise ValueError(f"Column {self.time_col} is not in datetime datatype")
+            times = pd.DatetimeIndex(df[self.time_col]).asi8
+        if self.method in statistic_methods and self.limit is None and times is None:
+            # the fill values do not depend on the order, so the rows are not sorted
+            filled = np.where(np.isnan(values), self.statistics()[codes].T, values)
+        else:
+            if times is None:
+                order = np.argsort(codes, kind='stable')
+            else:
+                rows = np.flatnonzero(df[self.time_col].notna().to_numpy())
+                order = rows[np.lexsort((times[rows], codes[rows]))]
+            filled = values.copy()
+            if len(order):
+                filled[:, order] = self.fill(np.ascontiguousarray(values[:, order]), codes[order],
+                                             None if times is None else times[order])
+        target = df if inplace else df.copy()
+        for j, column in enumerate(self.columns):
+            written = np.isnan(values[j]) & ~np.isnan(filled[j])
+            if written.any():
+                target.loc[written, column] = filled[j, written]
+        return None if inplace else target
+
+    def statistics(self):
+        """
+        Get the learned statistic of every group and column, the overall statistic of the column
+        for the groups without one.
+
+        Returns
+        -------
+         : ndarray
+            The 2-D array with one row per group and one column per column.
+        """
+        table = np.full((len(self.groups), len(self.columns)), np.nan)
+        table[:len(self.by_group)] = self.by_group
+        return np.where(np.isnan(table), self.overall, table)
+
+    def fit_transform(self, df, inplace=False):
+        """
+        Learn from a DataFrame and impute it. Please refer to fit and transform.
+        """
+        return self.fit(df).transform(df, inplace)
+
+    def fill(self, values, codes, times=None):
+        """
+        Fill the NaN values of rows sorted by group and order, and carry the last observed
+        values of each group to the next batch.
+
+        Parameters
+        ----------
+        values : ndarray
+            The 2-D array with one row per column, its columns sorted by group code then by order.
+        codes : ndarray
+            The sorted group codes.
+        times : ndarray, default None
+            The sorted int64 times, for the 'time' method.
+
+        Returns
+        -------
+         : ndarray
+            The 2-D array with the NaN values filled where possible.
+        """
+        width, size = values.shape
+        rows = np.arange(size)
+        # the first and one past the last position of the group of each position
+        first = np.ones(size, dtype=bool)
+        first[1:] = codes[1:]!=codes[:-1]
+        last = np.ones(size, dtype=bool)
+        last[:-1] = first[1:]
+        start = np.maximum.accumulate(np.where(first, rows, 0))
+        stop = np.minimum.accumulate(np.where(last, rows, size-1)[::-1])[::-1]+1
+        if self.method in ("linear", "time"):
+            x = (self.offset[codes]+rows-start).astype(float) if self.method=="linear" else times.astype(float)
+        # the previous and next observed cell of every cell, on the flat array of all the columns end to end
+        flat = values.ravel()
+        cells = np.arange(len(flat))
+        missing = np.isnan(flat)
+        prev = np.maximum.accumulate(np.where(missing, -1, cells))
+        after = np.minimum.accumulate(np.where(missing, len(flat), cells)[::-1])[::-1]
+        # the rest only looks at the NaN values, a neighbour outside the group of the column does not count
+        col, row = np.divmod(np.flatnonzero(missing), size)
+        group, base = codes[row], col*size
+        p, a = prev[base+row], after[base+row]
+        has_prev, has_next = p>=base+start[row], a<base+stop[row]
+        p, a = np.maximum(p, 0), np.minimum(a, len(flat)-1)
+        prev_value = np.where(has_prev, flat[p], self.last_value[group, col])
+        next_value = np.where(has_next, flat[a], np.nan)
+        p, a = p-base, a-base
+        if self.method in statistic_methods:
+            fill = self.statistics()[group, col]
+        elif self.method=="forward":
+            fill = prev_value
+        elif self.method=="backward":
+            fill = next_value
+        else:
+            prev_x = np.where(has_prev, x[np.maximum(p, 0)], self.last_x[group, col])
+            span = x[np.minimum(a, size-1)]-prev_x
+            with np.errstate(invalid='ignore', divide='ignore'):
+                weight = np.where(span>0, (x[row]-prev_x)/span, 0)
+            fill = prev_value + (next_value-prev_value)*weight
+        if self.limit is not None:
+            # the gap runs from the previous observed value, which may be in an earlier batch, to the next one
+            left = np.where(has_prev, p, start[row]-1-self.run[group, col])
+            right = np.where(has_next, a, stop[row])
+            fill = np.where(right-left-1<=self.limit, fill, np.nan)
+        res = flat.copy()
+        res[base+row] = fill
+        if self.stream:
+            ends = rows[last]
+            groups = codes[ends]
+            seen = prev[np.arange(width)*size+ends[:, None]]
+            found = seen>=np.arange(width)*size+start[ends][:, None]
+            seen = np.maximum(seen, 0)
+            self.last_value[groups] = np.where(found, flat[seen], self.last_value[groups])
+            seen = seen-np.arange(width)*size
+            if self.method in ("linear", "time"):
+                self.last_x[groups] = np.where(found, x[np.clip(seen, 0, size-1)], self.last_x[groups])
+            lengths = (ends-start[ends]+1)[:, None]
+            self.run[groups] = np.where(found, ends[:, None]-seen, self.run[groups]+lengths)
+            self.offset[groups] += lengths[:, 0]
+        return res.reshape(width, size)
@@ -0,0 +1,276 @@
+import warnings
+import numpy as np
+import pandas as pd
+from functools import partial
+from . import parallel
+from .profile import numeric_columns
+from .stream import QuantileSketch, StreamProfile, stream_profile
+from .utility import read_file
+from .instrument import instrumented
+
+# the default deviation of each method
+deviations = {'zscore': 2, 'iqr': 1.5, 'mad': 3}
+
+# scales the median absolute deviation to the standard deviation of normal data
+mad_scale = 1.4826
+
+def column_bounds(values, method="zscore", deviation=None):
+    """
+    Compute the range of the non-outlier values of a numerical column.
+
+    Parameters
+    ----------
+    values : ndarray
+        The float values of the column, missing values as NaN.
+    method : str, default 'zscore'
+        The outlier rule. The set of possible methods is:
+        'zscore' : outside mean ± deviation*std, std with ddof=0 as in verify.show_outlier.
+        'iqr' : outside [25% - deviation*IQR, 75% + deviation*IQR].
+        'mad' : outside median ± deviation*1.4826*MAD, MAD the median absolute deviation.
+    deviation : float, default None
+        The multiplier of the rule, 2 for 'zscore', 1.5 for 'iqr' and 3 for 'mad' if None.
+
+    Returns
+    -------
+     : tuple
+        The (low, high) bounds, NaN if the column has no values.
+    """
+    if method not in deviations:
+        raise ValueError("Wrong Parameter")
+    deviation = deviations[method] if deviation is None else deviation
+    missing = np.isnan(values)
+    if missing.any():
+        values = values[~missing]
+    if len(values)==0:
+        return np.nan, np.nan
+    if method=="zscore":
+        mean = values.mean()
+        std = np.sqrt(((values-mean)**2).mean())
+        return mean-deviation*std, mean+deviation*std
+    elif method=="iqr":
+        # np.percentile selects with a partition instead of sorting the column
+        q1, q3 = np.percentile(values, [25, 75])
+        return q1-deviation*(q3-q1), q3+deviation*(q3-q1)
+    median = np.percentile(values, 50)
+    mad = np.percentile(np.abs(values-median), 50)
+    return median-deviation*mad_scale*mad, median+deviation*mad_scale*mad
+
+def block_bounds(values, method="zscore", deviation=None):
+    """
+    Compute the ranges of the non-outlier values of the columns of a 2-D float array at once.
+
+    Parameters
+    ----------
+    values : ndarray
+        The 2-D array with one numerical column per array column, missing values as NaN.
+    method : str, default 'zscore'
+        Please refer to column_bounds.
+    deviation : float, default None
+        Please refer to column_bounds.
+
+    Returns
+    -------
+     : tuple
+        The arrays of the low and high bounds of each column, NaN for a column without values.
+    """
+    if method not in deviations:
+        raise ValueError("Wrong Parameter")
+    deviation = deviations[method] if deviation is None else deviation
+    if values.shape[0]==0:
+        return np.full(values.shape[1], np.nan), np.full(values.shape[1], np.nan)
+    # the NaN-aware reductions are only needed when a value is missing,
+    # a column without values gets NaN bounds and its warning is expected
+    # reduce along the rows of the transposed array, contiguous for the column blocks of
+    # find_outliers and parallel.map_shared, which is about twice as fast for the percentiles
+    columns = values.T
+    missing = np.isnan(columns).any(axis=1)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if method=="zscore":
+            mean = reduce_rows(np.mean, np.nanmean, columns, missing)
+            std = reduce_rows(np.std, np.nanstd, columns, missing)
+            return mean-deviation*std, mean+deviation*std
+        if method=="iqr":
+            q1, q3 = reduce_rows(np.percentile, np.nanpercentile, columns, missing, [25, 75])
+            return q1-deviation*(q3-q1), q3+deviation*(q3-q1)
+        median = reduce_rows(np.percentile, np.nanpercentile, columns, missing, 50)
+        # the absolute deviations are a new array, partitioned in place
+        spread = np.abs(columns-median[:, None])
+        mad = reduce_rows(np.percentile, np.nanpercentile, spread, missing, 50, overwrite_input=True)
+        return median-deviation*mad_scale*mad, median+deviation*mad_scale*mad
+
+def reduce_rows(func, nanfunc, values, missing, *args, **kwargs):
+    """
+    Reduce each row of a 2-D array, with the NaN-aware reduction only for the rows with missing values.
+
+    Parameters
+    ----------
+    func : function
+        The NumPy reduction like np.mean, that takes the axis keyword.
+    nanfunc : function
+        The NaN-aware version of func like np.nanmean.
+    values : ndarray
+        The 2-D float array.
+    missing : ndarray
+        Whether each row has a missing value.
+    args : tuple
+        The other positional arguments of func, like the percentiles.
+    kwargs : dict
+        The other keyword arguments of func.
+
+    Returns
+    -------
+     : ndarray
+        The reductions, one per row on the last axis.
+    """
+    if missing.all():
+        return nanfunc(values, *args, axis=1, **kwargs)
+    # reducing all the rows avoids copying the complete ones, the others are then redone
+    res = func(values, *args, axis=1, **kwargs)
+    if missing.any():
+        res[..., missing] = nanfunc(values[missing], *args, axis=1, **kwargs)
+    return res
+
+def block_outliers(values, method="zscore", deviation=None):
+    """
+    Find the outliers of the columns of a 2-D float array, with the bounds of all the columns
+    computed at once by block_bounds.
+
+    Parameters
+    ----------
+    values : ndarray
+        The 2-D array with one numerical column per array column, missing values as NaN.
+    method : str, default 'zscore'
+        Please refer to column_bounds.
+    deviation : float, default None
+        Please refer to column_bounds.
+
+    Returns
+    -------
+     : list
+        The (low, high, positions) of each column, positions as an int64 array of row positions.
+    """
+    low, high = block_bounds(values, method, deviation)
+    # the flags of the transposed array are in column order, so the positions of each column are contiguous
+    columns = values.T
+    cols, rows = np.nonzero((columns<low[:, None]) | (columns>high[:, None]))
+    parts = np.split(rows.astype('int64'), np.searchsorted(cols, np.arange(1, values.shape[1])))
+    return list(zip(low.tolist(), high.tolist(), parts))
+
+@instrumented
+def find_outliers(df, columns=None, method="zscore", deviation=None, n_jobs=None, block_size=2**25):
+    """
+    Find the outliers of numerical columns of a DataFrame. The columns are read once into 2-D
+    float blocks, the bounds of all the columns of a block are computed at once with selection
+    instead of sorting, and the outliers are returned as row positions, so no Series is copied.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The DataFrame that contains the numerical columns.
+    columns : list, default None
+        The numerical column names, all the numerical columns if None.
+    method : str, default 'zscore'
+        The outlier rule, 'zscore', 'iqr' or 'mad'. Please refer to column_bounds.
+    deviation : float, default None
+        Please refer to column_bounds.
+    n_jobs : int, default None
+        The number of worker processes, each worker takes a group of columns.
+        Please refer to parallel.resolve_jobs.
+    block_size : int, default 2**25
+        The largest number of values in a block, made of whole columns, to bound the memory.
+
+    Returns
+    -------
+     : tuple
+        The DataFrame with the 'low' and 'high' bounds as index and the column names as title,
+        and the dict of the outlier row positions by column name. df.index[positions] gives the labels.
+    """
+    if method not in deviations:
+        raise ValueError("Wrong Parameter")
+    columns = numeric_columns(df) if columns is None else list(columns)
+    if parallel.resolve_jobs(n_jobs)>1 and columns:
+        parts = parallel.map_shared(partial(block_outliers, method=method, deviation=deviation), df, columns, n_jobs)
+        res = [part for block in parts for part in block]
+    else:
+        res, step = [], max(1, block_size//max(len(df), 1))
+        for start in range(0, len(columns), step):
+            group = columns[start:start+step]
+            # one contiguous row per column, read transposed as one array column per column
+            values = np.empty((len(group), len(df)))
+            for i, column in enumerate(group):
+                values[i] = df[column].to_numpy(dtype=float, na_value=np.nan)
+            res.extend(block_outliers(values.T, method, deviation))
+    bounds = pd.DataFrame([[low for low, _, _ in res], [high for _, high, _ in res]],
+                          index=['low', 'high'], columns=columns, dtype=float)
+    return bounds, {column: positions for column, (_, _, positions) in zip(columns, res)}
+
+@instrumented
+def stream_outliers(path, columns=None, method="zscore", deviation=None, chunksize=100000, sep=',',
+                    orient=None, dtype=None, k=2048):
+    """
+    Find the outliers of numerical columns of a CSV or line-delimited JSON file chunk by chunk,
+    without loading the whole file into memory. The file is read once for the statistics,
+    once more for the median absolute deviations with the 'mad' method, and once to flag
+    the outliers. The quantiles of 'iqr' and 'mad' come from QuantileSketch, so they are
+    approximate once a column has more than k values.
+
+    Parameters
+    ----------
+    path : str or path object
+        The file path.
+    columns : list, default None
+        The numerical column names, all the numerical columns if None.
+    method : str, default 'zscore'
+        Please refer to column_bounds.
+    deviation : float, default None
+        Please refer to column_bounds.
+    chunksize : int, default 100000
+        The number of rows to read per chunk.
+    sep : str, default ','
+        Delimiter to use for CSV file.
+    orient : str, default None
+        Indication of expected JSON string format. Line-delimited JSON only supports 'records'.
+    dtype : dict, default None
+        The dtype of columns for CSV file. Please refer to stream.stream_profile.
+    k : int, default 2048
+        The size of the quantile sketches. Please refer to QuantileSketch.
+
+    Returns
+    -------
+     : tuple
+        The DataFrame of bounds and the dict of the outlier row positions in the file by column name.
+        Please refer to find_outliers.
+    """
+    if method not in deviations:
+        raise ValueError("Wrong Parameter")
+    deviation = deviations[method] if deviation is None else deviation
+    chunks = lambda: read_file(path, sep=sep, orient=orient, chunksize=chunksize, dtype=dtype)
+    prof = stream_profile(path, chunksize, sep, orient, dtype, prof=StreamProfile(k))
+    columns = list(prof.num_var_info().columns) if columns is None else list(columns)
+    aggregates = {column: prof.columns[column] for column in columns}
+    if method=="zscore":
+        limits = {column: (aggregate.mean-deviation*aggregate.std(ddof=0), aggregate.mean+deviation*aggregate.std(ddof=0))
+                  for column, aggregate in aggregates.items()}
+    elif method=="iqr":
+        quartiles = {column: aggregate.sketch.quantile([0.25, 0.75]) for column, aggregate in aggregates.items()}
+        limits = {column: (q1-deviation*(q3-q1), q3+deviation*(q3-q1)) for column, (q1, q3) in quartiles.items()}
+    else:
+        medians = {column: aggregate.sketch.quantile(0.5) for column, aggregate in aggregates.items()}
+        sketches = {column: QuantileSketch(k) for column in columns}
+        for chunk in chunks():
+            for column in columns:
+                sketches[column].update(np.abs(chunk[column].to_numpy(dtype=float, na_value=np.nan)-medians[column]))
+        limits = {column: (medians[column]-deviation*mad_scale*sketch.quantile(0.5),
+                           medians[column]+deviation*mad_scale*sketch.quantile(0.5)) for column, sketch in sketches.items()}
+    bounds = pd.DataFrame([[limits[column][0] for column in columns], [limits[column][1] for column in columns]],
+                          index=['low', 'high'], columns=columns, dtype=float)
+    positions, offset = {column: [] for column in columns}, 0
+    for chunk in chunks():
+        for column in columns:
+            values = chunk[column].to_numpy(dtype=float, na_value=np.nan)
+            low, high = bounds[column]
+            positions[column].append(np.flatnonzero((values<low) | (values>high)) + offset)
+        offset += len(chunk)
+    return bounds, {column: np.concatenate(parts) if parts else np.empty(0, dtype='int64')
+                    for column, parts in positions.items()}
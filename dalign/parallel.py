@@ -0,0 +1,147 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+def resolve_jobs(n_jobs):
+    """
+    Get the number of worker processes to use.
+
+    Parameters
+    ----------
+    n_jobs : int or None
+        The requested number of worker processes. None or 1 means serial execution,
+        -1 means one worker per CPU.
+
+    Returns
+    -------
+     : int
+        The number of worker processes, 1 for serial execution.
+    """
+    if n_jobs is None:
+        return 1
+    if n_jobs==-1:
+        return os.cpu_count() or 1
+    if n_jobs<1:
+        raise ValueError("Wrong Parameter")
+    return n_jobs
+
+def split(length, parts):
+    """
+    Split range(length) into at most parts contiguous (start, stop) slices of nearly equal size.
+
+    Parameters
+    ----------
+    length : int
+        The length of the range.
+    parts : int
+        The number of slices.
+
+    Returns
+    -------
+     : list
+        The (start, stop) tuples in order.
+    """
+    bounds = np.linspace(0, length, min(parts, length)+1).astype(int)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def shared_worker(func, name, shape, rows, columns):
+    """
+    Run func on a slice of the column buffer in shared memory. Executed in the worker process.
+
+    Parameters
+    ----------
+    func : function
+        The function that takes a 2-D float array with one column per array column.
+    name : str
+        The name of the shared memory block.
+    shape : tuple
+        The (number of columns, number of rows) shape of the buffer.
+    rows : tuple
+        The (start, stop) of the row slice.
+    columns : tuple
+        The (start, stop) of the column slice.
+
+    Returns
+    -------
+     : object
+        The return value of func.
+    """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return func(np.ndarray(shape, dtype=float, buffer=block.buf)[columns[0]:columns[1], rows[0]:rows[1]].T)
+    finally:
+        block.close()
+
+def map_shared(func, df, columns, n_jobs, by='columns'):
+    """
+    Copy numerical columns of a DataFrame once into a shared memory buffer, then apply func to
+    slices of it in a process pool, so the column data is not pickled to the workers.
+
+    Parameters
+    ----------
+    func : function
+        The module-level function that takes a 2-D float array with one column per array column,
+        missing values as NaN.
+    df : DataFrame
+        The DataFrame contains the numerical columns.
+    columns : list
+        The numerical column names.
+    n_jobs : int
+        The number of worker processes. Please refer to resolve_jobs.
+    by : str, default 'columns'
+        How the buffer is split between workers. The set of possible values is:
+        'columns' : each worker gets a contiguous group of whole columns.
+        'rows' : each worker gets a contiguous range of rows of all the columns.
+
+    Returns
+    -------
+     : list
+        The results of func for each slice, in column or row order.
+    """
+    n_jobs = resolve_jobs(n_jobs)
+    shape = (len(columns), df.shape[0])
+    if by=='columns':
+        tasks = [((0, shape[1]), part) for part in split(shape[0], n_jobs)]
+    elif by=='rows':
+        tasks = [(part, (0, shape[0])) for part in split(shape[1], n_jobs)]
+    else:
+        raise ValueError("Wrong Parameter")
+    block = shared_memory.SharedMemory(create=True, size=max(1, shape[0]*shape[1]*8))
+    try:
+        values = np.ndarray(shape, dtype=float, buffer=block.buf)
+        for i, column in enumerate(columns):
+            values[i] = df[column].to_numpy(dtype=float, na_value=np.nan)
+        del values
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [executor.submit(shared_worker, func, block.name, shape, rows, cols) for rows, cols in tasks]
+            return [future.result() for future in futures]
+    finally:
+        block.close()
+        block.unlink()
+
+def map_columns(func, df, columns, n_jobs):
+    """
+    Apply func to each column of a DataFrame in a process pool. Used for object columns
+    that cannot be put in a shared numeric buffer, so they are pickled to the workers.
+
+    Parameters
+    ----------
+    func : function
+        The module-level function that takes a Series.
+    df : DataFrame
+        The DataFrame contains the columns.
+    columns : list
+        The column names.
+    n_jobs : int
+        The number of worker processes. Please refer to resolve_jobs.
+
+    Returns
+    -------
+     : list
+        The results of func for each column, in column order.
+    """
+    n_jobs = resolve_jobs(n_jobs)
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        return list(executor.map(func, (df[column] for column in columns),
+                                 chunksize=max(1, len(columns)//(4*n_jobs))))
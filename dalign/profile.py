@@ -0,0 +1,259 @@
+import numpy as np
+import pandas as pd
+from . import parallel
+from .stream import NumericAggregate
+from .utility import is_categorical
+from .instrument import instrumented, stage
+
+class Profile:
+    """
+    The statistics of every column of a DataFrame, computed together by the profile function.
+    The reports are built from the statistics on first request and cached afterwards.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows of the DataFrame.
+    nulls : Series
+        The missing value counts with all the column names as index.
+    stats : DataFrame
+        The numerical column statistics with the column names as title and count, mean, std,
+        min, 25%, 50%, 75%, max, range and population std as index.
+    distinct : Series
+        The number of category types with the categorical column names as index.
+    dates : DataFrame, default None
+        The DataFrame.describe statistics of the datetime columns, with the column names as title.
+    """
+    def __init__(self, rows, nulls, stats, distinct, dates=None):
+        self.rows = rows
+        self.nulls = nulls
+        self.stats = stats
+        self.distinct = distinct
+        self.dates = pd.DataFrame() if dates is None else dates
+        self.reports = {}
+
+    def missing_val_info(self):
+        """
+        Show the DataFrame with the column has missing value as index and the missing counts
+        and missing percent of each column. Please refer to missing.missing_val_info.
+
+        Returns
+        -------
+        res : DataFrame
+            The DataFrame that reports missing values.
+        """
+        if 'missing_val_info' not in self.reports:
+            res = pd.DataFrame({"Missing": self.nulls[self.nulls!=0]})
+            res['Missing Percent %'] = res['Missing']/self.rows
+            self.reports['missing_val_info'] = res
+        return self.reports['missing_val_info'].copy()
+
+    def num_var_info(self):
+        """
+        Show statistics for all the numerical columns. Please refer to verify.num_var_info.
+
+        Returns
+        -------
+        res : DataFrame
+            The DataFrame with the numerical and datetime column names as title, and statistics as index.
+        """
+        if self.dates.shape[1]==0:
+            return self.stats.drop(index='pop_std')
+        if 'num_var_info' not in self.reports:
+            # assemble the columns like DataFrame.describe: one Series per column in the column order,
+            # the statistics in their order in the shortest Series first
+            numeric = self.stats.drop(index=['range', 'pop_std'])
+            columns = [column for column in self.nulls.index if column in numeric.columns or column in self.dates.columns]
+            parts = [numeric[column] if column in numeric.columns else self.dates[column] for column in columns]
+            names = list(dict.fromkeys(name for part in sorted(parts, key=len) for name in part.index))
+            res = pd.concat([part.reindex(names) for part in parts], axis=1, sort=False)
+            res.columns = columns
+            res.loc['range'] = res.loc['max',:]-res.loc['min',:]
+            self.reports['num_var_info'] = res
+        return self.reports['num_var_info'].copy()
+
+    def cat_var_type_counts(self):
+        """
+        Show how many categories are in each categorical column. Please refer to verify.cat_var_type_counts.
+
+        Returns
+        -------
+         : DataFrame
+            The DataFrame contains the categorical column names and the number of category types in each column.
+        """
+        if 'cat_var_type_counts' not in self.reports:
+            self.reports['cat_var_type_counts'] = pd.DataFrame({'column_name': self.distinct.index,
+                                                                'number_of_category_type': self.distinct.values})
+        return self.reports['cat_var_type_counts'].copy()
+
+def numeric_columns(df):
+    """
+    Get the numerical columns of a DataFrame, the same columns DataFrame.describe reports on.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The input DataFrame.
+
+    Returns
+    -------
+     : list
+        The numerical column names.
+    """
+    return [column for column in df.columns
+            if pd.api.types.is_numeric_dtype(df[column].dtype) and not pd.api.types.is_bool_dtype(df[column].dtype)]
+
+def moments(values):
+    """
+    Compute the mergeable moments of the columns of a 2-D float array.
+
+    Parameters
+    ----------
+    values : ndarray
+        The 2-D array with one numerical column per array column, missing values as NaN.
+
+    Returns
+    -------
+     : ndarray
+        The 2-D array with count, mean, sum of squared deviations, min and max as rows.
+    """
+    nulls = np.isnan(values)
+    count = (~nulls).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(nulls, 0, values).sum(axis=0)/count
+        m2 = (np.where(nulls, 0, values-mean)**2).sum(axis=0)
+    low = np.where(nulls, np.inf, values).min(axis=0, initial=np.inf)
+    high = np.where(nulls, -np.inf, values).max(axis=0, initial=-np.inf)
+    low[count==0] = np.nan
+    high[count==0] = np.nan
+    return np.vstack([count, mean, m2, low, high])
+
+def numeric_stats(values):
+    """
+    Compute the statistics of the columns of a 2-D float array at once.
+
+    Parameters
+    ----------
+    values : ndarray
+        The 2-D array with one numerical column per array column, missing values as NaN.
+
+    Returns
+    -------
+     : ndarray
+        The 2-D array with one row per statistic: count, mean, std, min, 25%, 50%, 75%, max,
+        range and population std.
+    """
+    count, mean, m2, low, high = moments(values)
+    count = count.astype(int)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(m2/(count-1))
+        pop_std = np.sqrt(m2/count)
+    std[count<2] = np.nan
+    empty = count==0
+    quartiles = np.full((3, values.shape[1]), np.nan)
+    if not np.isnan(values).any():
+        if values.shape[0]:
+            quartiles = np.percentile(values, [25, 50, 75], axis=0)
+    elif (~empty).any():
+        # sort each column once, NaN goes to the end, then interpolate within the non-NaN part
+        ordered = np.sort(values[:, ~empty], axis=0)
+        positions = np.array([[0.25], [0.5], [0.75]])*(count[~empty]-1)
+        below = np.floor(positions).astype(int)
+        above = np.minimum(below+1, count[~empty]-1)
+        columns = np.arange(ordered.shape[1])
+        lower = ordered[below, columns]
+        upper = ordered[above, columns]
+        quartiles[:, ~empty] = lower + (upper-lower)*(positions-below)
+    return np.vstack([count, mean, std, low, quartiles, high, high-low, pop_std])
+
+def category_stats(series):
+    """
+    Get the missing value count and the number of category types of a categorical column.
+
+    Parameters
+    ----------
+    series : Series
+        The categorical column.
+
+    Returns
+    -------
+     : tuple
+        The missing value count and the number of category types, counting missing values as one type.
+    """
+    return int(series.isnull().sum()), len(pd.unique(series))
+
+def column_moments(df, column, n_jobs=None):
+    """
+    Compute count, mean, sum of squared deviations, min and max of a numerical column,
+    splitting its rows between worker processes.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The DataFrame that contains the numerical column.
+    column : str
+        The numerical column name.
+    n_jobs : int, default None
+        The number of worker processes. Please refer to parallel.resolve_jobs.
+
+    Returns
+    -------
+     : NumericAggregate
+        The aggregate with the merged moments of all the rows.
+    """
+    res = NumericAggregate()
+    for part in parallel.map_shared(moments, df, [column], n_jobs, by='rows'):
+        count, mean, m2, low, high = part[:, 0]
+        if count:
+            res.combine(int(count), mean, m2, low, high)
+    return res
+
+@instrumented
+def profile(df, n_jobs=None):
+    """
+    Compute the statistics needed by missing_val_info, num_var_info, cat_var_type_counts
+    and show_outlier for all the columns of a DataFrame in one pass. The numerical columns
+    are processed together as one 2-D array, instead of column by column. The datetime columns
+    that num_var_info also reports are described in the calling process.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The DataFrame to profile.
+    n_jobs : int, default None
+        The number of worker processes. If provided, the numerical columns are copied once into
+        shared memory and split between the workers, and the categorical columns are sent to 
+        the workers one by one. The result is the same as the serial one. 
+        Please refer to parallel.resolve_jobs.
+
+    Returns
+    -------
+     : Profile
+        The profile that the report functions can read from with their prof parameter.
+    """
+    index = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max', 'range', 'pop_std']
+    columns = numeric_columns(df)
+    categorical = [column for column in df.columns if is_categorical(df[column].dtype)]
+    dates = [column for column in df.columns if pd.api.types.is_datetime64_any_dtype(df[column].dtype)]
+    with stage('datetime', len(df)):
+        described = df[dates].describe() if dates else None
+    if parallel.resolve_jobs(n_jobs)==1:
+        nulls = df.isnull().sum()
+        with stage('numeric', len(df)):
+            values = df[columns].to_numpy(dtype=float, na_value=np.nan)
+            stats = pd.DataFrame(numeric_stats(values), columns=columns, index=index)
+        with stage('categorical', len(df)):
+            distinct = pd.Series([len(pd.unique(df[column])) for column in categorical], index=categorical, dtype='int64')
+        return Profile(df.shape[0], nulls, stats, distinct, described)
+    with stage('numeric', len(df)):
+        parts = parallel.map_shared(numeric_stats, df, columns, n_jobs) if columns else []
+        stats = pd.DataFrame(np.hstack(parts) if parts else np.empty((len(index), 0)), columns=columns, index=index)
+    with stage('categorical', len(df)):
+        categories = parallel.map_columns(category_stats, df, categorical, n_jobs) if categorical else []
+    distinct = pd.Series([types for _, types in categories], index=categorical, dtype='int64')
+    nulls = {column: df.shape[0]-int(count) for column, count in stats.loc['count'].items()}
+    nulls.update({column: missing for column, (missing, _) in zip(categorical, categories)})
+    others = [column for column in df.columns if column not in nulls]
+    nulls.update(df[others].isnull().sum().to_dict())
+    nulls = pd.Series([nulls[column] for column in df.columns], index=df.columns, dtype='int64')
+    return Profile(df.shape[0], nulls, stats, distinct, described)
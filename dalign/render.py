@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+from .instrument import stage
+
+def hist_counts(values, bins="auto", max_bins=1000, sample_size=100000, seed=0):
+    """
+    Precompute a histogram of a numerical array, so the plot is drawn from the bin counts
+    instead of the raw values. The bin edges are chosen on a random sample of the values,
+    then all the values are counted in a single pass.
+
+    Parameters
+    ----------
+    values : array-like
+        The numerical values, missing values are skipped.
+    bins : int or str, default 'auto'
+        The number of bins or the numpy binning rule.
+    max_bins : int, default 1000
+        The largest number of bins, so the plot time does not depend on the spread of the values.
+    sample_size : int, default 100000
+        The number of values used to choose the bin edges.
+    seed : int, default 0
+        The seed of the sample.
+
+    Returns
+    -------
+     : tuple
+        The (counts, edges) of the histogram, as returned by np.histogram.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values)==0:
+        return np.zeros(0, dtype=int), np.zeros(1)
+    low, high = values.min(), values.max()
+    sample = values
+    if len(values)>sample_size:
+        sample = np.random.default_rng(seed).choice(values, sample_size, replace=False)
+    edges = np.histogram_bin_edges(sample, bins=bins, range=(low, high))
+    if len(edges)-1>max_bins:
+        edges = np.linspace(low, high, max_bins+1)
+    counts, edges = np.histogram(values, bins=edges)
+    return counts, edges
+
+def unit_counts(values):
+    """
+    Count the occurrences of each integer value, e.g. the unit values of a datetime column.
+
+    Parameters
+    ----------
+    values : array-like
+        The integer values, missing values are skipped.
+
+    Returns
+    -------
+     : tuple
+        The (units, counts) arrays of the values that occur, in increasing order.
+    """
+    values = pd.Series(values).dropna().to_numpy(dtype='int64')
+    if len(values)==0:
+        return np.zeros(0, dtype='int64'), np.zeros(0, dtype='int64')
+    low = values.min()
+    counts = np.bincount(values-low)
+    units = np.flatnonzero(counts)
+    return units+low, counts[units]
+
+def bin_points(x, y, y_bins=256, x_bins=None):
+    """
+    Reduce a scatter of points to the non-empty cells of a 2D grid, keeping the number of points
+    and the mean position of each cell, so the density of the scatter is preserved while the
+    number of drawn points is bounded by the grid size.
+
+    Parameters
+    ----------
+    x : array-like
+        The x values. Missing values are skipped with their points.
+    y : array-like
+        The y values. Missing values are skipped with their points.
+    y_bins : int, default 256
+        The number of bins along y.
+    x_bins : int, default None
+        The number of bins along x. If None, every distinct x value is its own bin,
+        which suits discrete values such as time units.
+
+    Returns
+    -------
+     : DataFrame
+        One row per non-empty cell with the mean 'x', the mean 'y' and the 'count' of points.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[keep], y[keep]
+    if len(x)==0:
+        return pd.DataFrame({'x': [], 'y': [], 'count': []})
+    if x_bins is None:
+        _, x_codes = np.unique(x, return_inverse=True)
+        x_size = x_codes.max()+1
+    else:
+        x_codes, x_size = grid_codes(x, x_bins), x_bins
+    cells = x_codes*y_bins + grid_codes(y, y_bins)
+    counts = np.bincount(cells, minlength=x_size*y_bins)
+    used = np.flatnonzero(counts)
+    counts = counts[used]
+    return pd.DataFrame({'x': np.bincount(cells, weights=x, minlength=x_size*y_bins)[used]/counts,
+                         'y': np.bincount(cells, weights=y, minlength=x_size*y_bins)[used]/counts,
+                         'count': counts})
+
+def grid_codes(values, bins):
+    """
+    Get the bin of each value with bins of equal width between the min and the max.
+
+    Parameters
+    ----------
+    values : ndarray
+        The float values without missing values.
+    bins : int
+        The number of bins.
+
+    Returns
+    -------
+     : ndarray
+        The bin of each value, from 0 to bins-1.
+    """
+    low, high = values.min(), values.max()
+    if high==low:
+        return np.zeros(len(values), dtype='int64')
+    return np.minimum(((values-low)/(high-low)*bins).astype('int64'), bins-1)
+
+def histplot(series, max_points=100000):
+    """
+    Plot the value distribution of a column like seaborn.histplot. A numerical column longer than
+    max_points is drawn from precomputed bin counts, so the plot time does not depend on its length.
+
+    Parameters
+    ----------
+    series : Series
+        The column to plot.
+    max_points : int, default 100000
+        The longest column that is handed to seaborn as it is.
+    """
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+    if (len(series)<=max_points or pd.api.types.is_bool_dtype(series.dtype)
+            or not pd.api.types.is_numeric_dtype(series.dtype)):
+        with stage('render', len(series)):
+            sns.histplot(series)
+        return
+    with stage('reduce', len(series)):
+        counts, edges = hist_counts(series.to_numpy(dtype=float, na_value=np.nan))
+    with stage('render', len(counts)):
+        if len(counts)==0:
+            sns.histplot(series)
+            return
+        sns.histplot(x=edges[:-1], weights=counts, bins=list(edges))
+    plt.xlabel(series.name)
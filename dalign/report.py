@@ -0,0 +1,278 @@
+import base64
+import os
+import re
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from time import perf_counter
+from . import parallel, render
+from .profile import numeric_columns
+from .utility import is_categorical
+from .instrument import instrumented
+
+def figure_specs(df, kinds=("num", "cat"), max_category_num=10):
+    """
+    Reduce the columns of a DataFrame to the small data their report figures are drawn from,
+    so only bin counts and category counts are sent to the rendering processes.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The input DataFrame.
+    kinds : tuple, default ('num', 'cat')
+        The figures to make. The set of possible kinds is:
+        'num' : a histogram of each numerical column, as in verify.num_var_dist.
+        'cat' : a pie chart of each categorical column with less than max_category_num
+                categories, as in verify.cat_var_vis.
+    max_category_num : int, default 10
+        Please refer to verify.cat_var_vis.
+
+    Returns
+    -------
+     : list
+        The figure specs in column order, dicts with the 'column', the 'kind', the reduced
+        'data' and the 'seconds' spent on the reduction.
+    """
+    for kind in kinds:
+        if kind not in ("num", "cat"):
+            raise ValueError("Wrong Parameter")
+    numeric = set(numeric_columns(df)) if "num" in kinds else set()
+    specs = []
+    for column in df.columns:
+        start = perf_counter()
+        if column in numeric:
+            counts, edges = render.hist_counts(df[column].to_numpy(dtype=float, na_value=np.nan))
+            spec = {'column': column, 'kind': 'num', 'data': (counts, edges)}
+        elif "cat" in kinds and is_categorical(df[column].dtype):
+            if len(df[column].unique())>=max_category_num:
+                continue
+            counts = df[column].value_counts()
+            spec = {'column': column, 'kind': 'cat', 'data': (counts.index.astype(str).tolist(), counts.to_numpy())}
+        else:
+            continue
+        spec['seconds'] = perf_counter()-start
+        specs.append(spec)
+    return specs
+
+def render_figure(spec, path, dpi=100, label_distance=1.5):
+    """
+    Draw one report figure with the Agg canvas and save it, without touching the pyplot state,
+    so it can run in a worker process of a scheduled job without any display.
+
+    Parameters
+    ----------
+    spec : dict
+        The figure spec. Please refer to figure_specs.
+    path : str
+        The PNG file to write.
+    dpi : int, default 100
+        The resolution of the PNG file.
+    label_distance : float, default 1.5
+        The distance between category labels of pie charts.
+
+    Returns
+    -------
+     : float
+        The seconds spent on drawing and saving.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    start = perf_counter()
+    fig = Figure(figsize=(6, 4))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    if spec['kind']=='num':
+        counts, edges = spec['data']
+        if len(counts):
+            ax.stairs(counts, edges, fill=True)
+        ax.set_xlabel(spec['column'])
+        ax.set_ylabel('Count')
+    else:
+        labels, counts = spec['data']
+        ax.pie(counts, labels=labels, labeldistance=label_distance)
+        ax.legend(bbox_to_anchor=(0.2,0.2))
+        ax.set_title(spec['column'])
+    fig.savefig(path, dpi=dpi)
+    return perf_counter()-start
+
+def figure_file(number, column):
+    """
+    Get a file name for the figure of a column that is safe on every file system.
+
+    Parameters
+    ----------
+    number : int
+        The position of the figure in the report.
+    column : str
+        The column name.
+
+    Returns
+    -------
+     : str
+        The PNG file name.
+    """
+    return f"{number:04d}_{re.sub(r'[^A-Za-z0-9_.-]', '_', str(column))[:64]}.png"
+
+def table_directory(number, table):
+    """
+    Get a directory name for the figures of a table that is safe on every file system.
+    The position prefix keeps the names unique when table names only differ by unsafe characters.
+
+    Parameters
+    ----------
+    number : int
+        The position of the table in the report.
+    table : str
+        The table name.
+
+    Returns
+    -------
+     : str
+        The directory name.
+    """
+    return f"{number:04d}_{re.sub(r'[^A-Za-z0-9_.-]', '_', str(table))[:64]}"
+
+def write_html(figures, path, title):
+    """
+    Write the figures of a report into one self-contained HTML file with embedded PNG images.
+
+    Parameters
+    ----------
+    figures : DataFrame
+        The figures of the report with their 'column' and 'path'.
+    path : str
+        The HTML file to write.
+    title : str
+        The title of the page.
+
+    Returns
+    -------
+     : str
+        The path of the HTML file.
+    """
+    title = escape(title)
+    parts = [f"<html><head><meta charset='utf-8'><title>{title}</title></head><body><h1>{title}</h1>"]
+    for column, figure in zip(figures['column'], figures['path']):
+        with open(figure, 'rb') as file:
+            image = base64.b64encode(file.read()).decode('ascii')
+        parts.append(f"<h2>{escape(str(column))}</h2><img src='data:image/png;base64,{image}'>")
+    parts.append("</body></html>")
+    with open(path, 'w') as file:
+        file.write("\n".join(parts))
+    return path
+
+def report_tables(tables, directories, kinds, n_jobs, html, dpi, max_category_num, label_distance):
+    """
+    Render the per-column figures of many DataFrames into their directories. Please refer to batch_report.
+
+    Parameters
+    ----------
+    tables : dict
+        The DataFrames to report on, by table name.
+    directories : dict
+        The output directory of each table, created if needed.
+
+    Returns
+    -------
+     : tuple
+        Please refer to batch_report.
+    """
+    n_jobs = parallel.resolve_jobs(n_jobs)
+    executor = ProcessPoolExecutor(max_workers=n_jobs) if n_jobs>1 else None
+    rows = []
+    try:
+        for table, df in tables.items():
+            os.makedirs(directories[table], exist_ok=True)
+            for number, spec in enumerate(figure_specs(df, kinds, max_category_num)):
+                file = os.path.join(directories[table], figure_file(number, spec['column']))
+                if executor is None:
+                    seconds = render_figure(spec, file, dpi, label_distance)
+                else:
+                    seconds = executor.submit(render_figure, spec, file, dpi, label_distance)
+                rows.append([table, spec['column'], spec['kind'], file, spec['seconds'], seconds])
+        if executor is not None:
+            for row in rows:
+                row[5] = row[5].result()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    figures = pd.DataFrame(rows, columns=['table', 'column', 'kind', 'path', 'prepare_seconds', 'render_seconds'])
+    htmls = {}
+    if html:
+        for table in tables:
+            htmls[table] = write_html(figures[figures['table']==table], os.path.join(directories[table], 'index.html'), str(table))
+    return figures, htmls
+
+@instrumented
+def batch_report(tables, path, kinds=("num", "cat"), n_jobs=None, html=True, dpi=100,
+                 max_category_num=10, label_distance=1.5):
+    """
+    Render the per-column figures of many DataFrames headlessly, sharing one pool of worker
+    processes. The columns are reduced in the calling process while the workers draw the
+    figures of the tables reduced before.
+
+    Parameters
+    ----------
+    tables : dict
+        The DataFrames to report on, by table name. Each table gets its own subdirectory of path,
+        named by table_directory.
+    path : str or path object
+        The output directory, created if needed.
+    kinds : tuple, default ('num', 'cat')
+        Please refer to figure_specs.
+    n_jobs : int, default None
+        The number of worker processes that draw the figures, -1 means one per CPU.
+        The figures are drawn in the calling process if None.
+    html : bool, default True
+        Whether to bundle the figures of each table into one index.html file.
+    dpi : int, default 100
+        The resolution of the PNG files.
+    max_category_num : int, default 10
+        Please refer to verify.cat_var_vis.
+    label_distance : float, default 1.5
+        Please refer to verify.cat_var_vis.
+
+    Returns
+    -------
+     : tuple
+        The DataFrame of figures with their 'table', 'column', 'kind', 'path' and the 'prepare_seconds'
+        and 'render_seconds' spent on them, and the dict of HTML file paths by table name.
+    """
+    directories = {table: os.path.join(path, table_directory(number, table)) for number, table in enumerate(tables)}
+    return report_tables(tables, directories, kinds, n_jobs, html, dpi, max_category_num, label_distance)
+
+@instrumented
+def write_report(df, path, kinds=("num", "cat"), n_jobs=None, html=True, dpi=100,
+                 max_category_num=10, label_distance=1.5):
+    """
+    Render the per-column figures of a DataFrame headlessly into a directory.
+    Please refer to batch_report.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The DataFrame to report on.
+    path : str or path object
+        The output directory, created if needed.
+    kinds : tuple, default ('num', 'cat')
+        Please refer to figure_specs.
+    n_jobs : int, default None
+        Please refer to batch_report.
+    html : bool, default True
+        Whether to bundle the figures into one index.html file.
+    dpi : int, default 100
+        The resolution of the PNG files.
+    max_category_num : int, default 10
+        Please refer to verify.cat_var_vis.
+    label_distance : float, default 1.5
+        Please refer to verify.cat_var_vis.
+
+    Returns
+    -------
+     : tuple
+        The DataFrame of figures with their 'column', 'kind', 'path' and the 'prepare_seconds' and
+        'render_seconds' spent on them, and the path of the HTML file, None if html is False.
+    """
+    figures, htmls = report_tables({'': df}, {'': path}, kinds, n_jobs, html, dpi, max_category_num, label_distance)
+    return figures.drop(columns='table'), htmls.get('')
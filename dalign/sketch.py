@@ -0,0 +1,267 @@
+import numpy as np
+import pandas as pd
+
+def value_hashes(series):
+    """
+    Get a 64-bit hash of every non-missing value of a column.
+
+    Parameters
+    ----------
+    series : Series
+        The column.
+
+    Returns
+    -------
+     : ndarray
+        The uint64 hashes of the non-missing values.
+    """
+    series = series[series.notnull()]
+    return pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+def chunks(series, chunksize):
+    """
+    Split a column into consecutive chunks, so the temporary arrays of a sketch update
+    do not grow with the length of the column.
+
+    Parameters
+    ----------
+    series : Series
+        The column.
+    chunksize : int
+        The number of rows per chunk.
+
+    Returns
+    -------
+     : generator
+        The chunks of the column.
+    """
+    for start in range(0, len(series), chunksize):
+        yield series.iloc[start:start+chunksize]
+
+class HyperLogLog:
+    """
+    Mergeable approximate distinct counter. Each value is hashed, the first p bits of the hash
+    pick a register and the register keeps the largest rank of the first set bit seen in the
+    other bits. The memory is 2**p bytes whatever the number of distinct values.
+
+    Parameters
+    ----------
+    error : float, default 0.01
+        The relative standard error of the count, which sets p to the smallest value
+        with 1.04/sqrt(2**p) <= error, between 4 and 18.
+    """
+    def __init__(self, error=0.01):
+        self.p = int(min(18, max(4, np.ceil(np.log2((1.04/error)**2)))))
+        self.registers = np.zeros(2**self.p, dtype='uint8')
+
+    def update(self, series, chunksize=1000000):
+        """
+        Add the non-missing values of a column to the counter.
+
+        Parameters
+        ----------
+        series : Series
+            The column.
+        chunksize : int, default 1000000
+            The number of rows hashed at a time.
+        """
+        for chunk in chunks(series, chunksize):
+            hashes = value_hashes(chunk)
+            index = (hashes>>np.uint64(64-self.p)).astype('int64')
+            # the rank comes from the low 32 bits, which do not overlap the register bits
+            low = (hashes & np.uint64(0xFFFFFFFF)).astype(float)
+            rank = np.full(len(low), 33, dtype='uint8')
+            nonzero = low>0
+            rank[nonzero] = 32 - np.floor(np.log2(low[nonzero])).astype('uint8')
+            np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        """
+        Merge another counter with the same error into this counter.
+
+        Parameters
+        ----------
+        other : HyperLogLog
+            The counter to merge.
+        """
+        if other.p!=self.p:
+            raise ValueError("Wrong Parameter")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        """
+        Get the approximate number of distinct values.
+
+        Returns
+        -------
+         : int
+            The estimated number of distinct values.
+        """
+        m = len(self.registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213/(1+1.079/m))
+        estimate = alpha*m*m/np.sum(2.0**-self.registers.astype(float))
+        zeros = np.count_nonzero(self.registers==0)
+        if estimate<=2.5*m and zeros:
+            # linear counting is more accurate for small cardinalities
+            estimate = m*np.log(m/zeros)
+        return int(round(estimate))
+
+class SpaceSaving:
+    """
+    Mergeable heavy-hitter summary that keeps at most capacity categories with an upper
+    bound of their counts. Every category with more than n/capacity occurrences among the
+    n values seen is kept, and each kept count exceeds the true count by at most its error,
+    itself at most n/capacity. While fewer than capacity categories have been seen,
+    the counts are exact.
+
+    Parameters
+    ----------
+    capacity : int, default 100
+        The number of categories kept.
+    """
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+        self.errors = pd.Series(dtype='int64')
+        self.nulls = 0
+
+    def floor(self):
+        """
+        Get the count that any category not kept in the summary may have at most.
+
+        Returns
+        -------
+         : int
+            The smallest kept count once the summary is full, 0 before.
+        """
+        return int(self.counts.min()) if len(self.counts)>=self.capacity else 0
+
+    def update(self, series, chunksize=1000000):
+        """
+        Add the values of a column to the summary. Each chunk is counted exactly,
+        then merged into the summary.
+
+        Parameters
+        ----------
+        series : Series
+            The column.
+        chunksize : int, default 1000000
+            The number of rows counted at a time.
+        """
+        for chunk in chunks(series, chunksize):
+            self.nulls += int(chunk.isnull().sum())
+            counts = chunk.value_counts(dropna=True)
+            counts = counts[counts>0]
+            self.combine(counts, pd.Series(0, index=counts.index, dtype='int64'), 0)
+        return self
+
+    def merge(self, other):
+        """
+        Merge another summary into this summary.
+
+        Parameters
+        ----------
+        other : SpaceSaving
+            The summary to merge.
+        """
+        self.nulls += other.nulls
+        self.combine(other.counts, other.errors, other.floor())
+        return self
+
+    def combine(self, counts, errors, floor):
+        """
+        Combine the counts of another summary, then keep the capacity largest counts.
+        A category missing from one side is counted with the floor of that side.
+
+        Parameters
+        ----------
+        counts : Series
+            The category counts of the other summary.
+        errors : Series
+            The errors of the counts of the other summary.
+        floor : int
+            The floor of the other summary.
+        """
+        own_floor = self.floor()
+        categories = self.counts.index.union(counts.index, sort=False)
+        total = (self.counts.reindex(categories, fill_value=own_floor)
+                 + counts.reindex(categories, fill_value=floor))
+        error = (self.errors.reindex(categories, fill_value=own_floor)
+                 + errors.reindex(categories, fill_value=floor))
+        if len(total)>self.capacity:
+            total = total.nlargest(self.capacity, keep='first')
+        self.counts = total.astype('int64')
+        self.errors = error[total.index].astype('int64')
+
+    def exact(self):
+        """
+        Check whether every category seen is kept with its exact count.
+
+        Returns
+        -------
+         : bool
+            True if the errors are all zero and the summary is not full.
+        """
+        return len(self.counts)<self.capacity and not self.errors.any()
+
+    def top(self, k=None):
+        """
+        Get the most frequent categories like Series.value_counts.
+
+        Parameters
+        ----------
+        k : int, default None
+            The number of categories, all the kept ones if None.
+
+        Returns
+        -------
+         : Series
+            The upper bounds of the category counts, most frequent first.
+        """
+        res = self.counts.sort_values(ascending=False, kind='stable')
+        return res if k is None else res[:k]
+
+def approx_distinct(series, error=0.01):
+    """
+    Get the approximate number of category types of a column, counting missing values
+    as one type like Series.unique.
+
+    Parameters
+    ----------
+    series : Series
+        The categorical column.
+    error : float, default 0.01
+        The relative standard error. Please refer to HyperLogLog.
+
+    Returns
+    -------
+     : int
+        The estimated number of category types.
+    """
+    return HyperLogLog(error).update(series).count() + int(series.isnull().any())
+
+def heavy_hitters(series, error=0.001, k=None):
+    """
+    Get the approximate counts of the most frequent categories of a column.
+
+    Parameters
+    ----------
+    series : Series
+        The categorical column.
+    error : float, default 0.001
+        The largest count error as a fraction of the column length, which sets the capacity
+        of the summary to 1/error. Please refer to SpaceSaving.
+    k : int, default None
+        The number of categories wanted, the capacity is raised to k if it is lower.
+
+    Returns
+    -------
+     : SpaceSaving
+        The summary of the column.
+    """
+    capacity = int(np.ceil(1/error))
+    if k is not None:
+        capacity = max(capacity, k)
+    return SpaceSaving(capacity).update(series)
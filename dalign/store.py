@@ -0,0 +1,401 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from .time import time_bound
+from .instrument import instrumented
+
+class TimeStore:
+    """
+    A dataset materialized on disk as one raw binary file per column, sorted by its datetime column,
+    and opened as memory maps. Only the pages of the rows that a query needs are read from disk,
+    so the dataset can be larger than memory. Please refer to materialize and open_store.
+
+    Column kinds on disk:
+    'float' : numerical columns as float64, missing values as NaN.
+    'bool' : boolean columns as int8 0 and 1, missing values as -1.
+    'datetime' : datetime columns as int64 nanoseconds since epoch in UTC, missing values as NaT.
+    'category' : all the other columns as int32 codes into a list of categories, missing values as -1.
+
+    Parameters
+    ----------
+    path : str or path object
+        The directory of the store.
+    meta : dict
+        The content of the meta.json file of the store.
+    """
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+        self.time_col = meta['time_col']
+        self.columns = [column['name'] for column in meta['columns']]
+        self.specs = {column['name']: column for column in meta['columns']}
+        # empty files cannot be memory mapped
+        self.arrays = {column['name']: np.memmap(os.path.join(path, column['file']), mode='r',
+                                                 dtype=disk_dtype(column['kind']), shape=(meta['rows'],))
+                       if meta['rows'] else np.empty(0, dtype=disk_dtype(column['kind']))
+                       for column in meta['columns']}
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    def block_range(self, column, low=None, high=None):
+        """
+        Get the blocks whose min/max statistics of a column intersect [low, high].
+
+        Parameters
+        ----------
+        column : str
+            The name of a 'float' or 'datetime' column.
+        low : float or int, default None
+            The lower bound, in the on-disk unit of the column. No bound if None.
+        high : float or int, default None
+            The upper bound, in the on-disk unit of the column. No bound if None.
+
+        Returns
+        -------
+         : ndarray
+            The boolean mask of the blocks.
+        """
+        stats = self.meta['stats'][column]
+        if self.specs[column]['kind']=='datetime':
+            # keep nanoseconds exact, blocks without any value never match a bound
+            mins = np.array([np.iinfo('int64').max if value is None else value for value in stats['min']], dtype='int64')
+            maxs = np.array([np.iinfo('int64').min if value is None else value for value in stats['max']], dtype='int64')
+        else:
+            mins = np.array(stats['min'], dtype=float)
+            maxs = np.array(stats['max'], dtype=float)
+        keep = np.ones(len(mins), dtype=bool)
+        if low is not None:
+            keep &= maxs>=low
+        if high is not None:
+            keep &= mins<=high
+        return keep
+
+    def time_rows(self, start=None, end=None):
+        """
+        Get the row range with time in [start, end]. The blocks are picked with their min/max time,
+        then the rows are found by binary search inside the picked blocks only.
+
+        Parameters
+        ----------
+        start : str or Timestamp, default None
+            The start time of the interval, no lower bound if None.
+        end : str or Timestamp, default None
+            The end time of the interval, no upper bound if None.
+
+        Returns
+        -------
+         : slice
+            The rows in the interval.
+        """
+        tz = self.specs[self.time_col]['tz']
+        low = None if start is None else utc_ns(time_bound(start, tz))
+        high = None if end is None else utc_ns(time_bound(end, tz))
+        blocks = np.flatnonzero(self.block_range(self.time_col, low, high))
+        if len(blocks)==0:
+            return slice(0, 0)
+        size = self.meta['block_size']
+        first, last = blocks[0]*size, min((blocks[-1]+1)*size, len(self))
+        times = self.arrays[self.time_col][first:last]
+        begin = first if low is None else first + np.searchsorted(times, low, side='left')
+        stop = last if high is None else first + np.searchsorted(times, high, side='right')
+        return slice(begin, stop)
+
+    def column(self, name, rows=slice(None)):
+        """
+        Read some rows of a column into memory.
+
+        Parameters
+        ----------
+        name : str
+            The column name.
+        rows : slice or ndarray, default all rows
+            The rows to read.
+
+        Returns
+        -------
+         : Series
+            The column values in the original dtype family.
+        """
+        spec = self.specs[name]
+        values = np.asarray(self.arrays[name][rows])
+        if spec['kind']=='datetime':
+            values = pd.to_datetime(values.view('datetime64[ns]'))
+            if spec['tz'] is not None:
+                values = values.tz_localize('UTC').tz_convert(spec['tz'])
+        elif spec['kind']=='category':
+            categories = np.array(spec['categories'] + [np.nan], dtype=object)
+            values = categories[values]
+        elif spec['kind']=='bool':
+            values = np.array([False, True, np.nan], dtype=object)[values] if (values<0).any() else values.astype(bool)
+        return pd.Series(values, name=name)
+
+    def query(self, start=None, end=None, columns=None, where=None):
+        """
+        Read the rows with time in [start, end] into a DataFrame.
+
+        Parameters
+        ----------
+        start : str or Timestamp, default None
+            The start time of the interval, no lower bound if None.
+        end : str or Timestamp, default None
+            The end time of the interval, no upper bound if None.
+        columns : list, default None
+            The columns to read, all the columns if None.
+        where : dict, default None
+            Extra {column: (low, high)} bounds on 'float' columns. Blocks whose min/max statistics
+            are out of the bounds are skipped, then the remaining rows are filtered.
+
+        Returns
+        -------
+         : DataFrame
+            The selected rows, indexed by their row number in the store.
+        """
+        rows = self.time_rows(start, end)
+        columns = self.columns if columns is None else list(columns)
+        if where:
+            size = self.meta['block_size']
+            blocks = np.zeros(-(-len(self)//size), dtype=bool)
+            blocks[rows.start//size:-(-rows.stop//size)] = True
+            for name, (low, high) in where.items():
+                blocks &= self.block_range(name, low, high)
+            # filter the rows block by block, only reading the blocks that can match
+            positions = []
+            for block in np.flatnonzero(blocks):
+                block_rows = np.arange(max(block*size, rows.start), min((block+1)*size, rows.stop))
+                keep = np.ones(len(block_rows), dtype=bool)
+                for name, (low, high) in where.items():
+                    values = np.asarray(self.arrays[name][block_rows[0]:block_rows[-1]+1]) if len(block_rows) else np.empty(0)
+                    keep &= (values>=low) & (values<=high)
+                positions.append(block_rows[keep])
+            rows = np.concatenate(positions) if positions else np.empty(0, dtype=int)
+            index = rows
+        else:
+            index = np.arange(rows.start, rows.stop)
+        return pd.DataFrame({name: self.column(name, rows).to_numpy() for name in columns}, index=index)
+
+def disk_dtype(kind):
+    """
+    Get the numpy dtype used on disk for a column kind. Please refer to TimeStore.
+
+    Parameters
+    ----------
+    kind : str
+        The column kind.
+
+    Returns
+    -------
+     : dtype
+        The on-disk dtype.
+    """
+    return np.dtype({'float': 'float64', 'bool': 'int8', 'datetime': 'int64', 'category': 'int32'}[kind])
+
+def utc_ns(value):
+    """
+    Get nanoseconds since epoch in UTC of a Timestamp, taking Timestamps without time zone as UTC.
+
+    Parameters
+    ----------
+    value : Timestamp
+        The time.
+
+    Returns
+    -------
+     : int
+        The nanoseconds since epoch.
+    """
+    return (value if value.tz is None else value.tz_convert('UTC').tz_localize(None)).as_unit('ns').value
+
+def column_kind(series):
+    """
+    Get the on-disk kind of a column. Please refer to TimeStore.
+
+    Parameters
+    ----------
+    series : Series
+        The column.
+
+    Returns
+    -------
+     : str
+        The column kind.
+    """
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return 'bool'
+    elif series.dtype==object and pd.api.types.infer_dtype(series, skipna=True)=='boolean':
+        # a boolean column with missing values is read as object
+        return 'bool'
+    elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return 'datetime'
+    elif pd.api.types.is_numeric_dtype(series.dtype):
+        return 'float'
+    return 'category'
+
+@instrumented
+def materialize(data, path, time_col, block_size=65536):
+    """
+    Write a dataset to a directory as one raw binary file per column, sorted by the datetime column,
+    with min/max statistics per block of rows, so that TimeStore can query time ranges out of core.
+
+    Parameters
+    ----------
+    data : DataFrame or iterable of DataFrame
+        The dataset. An iterable of chunks, e.g. from utility.read_file with chunksize, is written
+        chunk by chunk; the chunks then have to be sorted by the datetime column already.
+        A DataFrame is sorted before writing.
+    path : str or path object
+        The directory to write, created if needed.
+    time_col : str
+        The column name of the datetime column. Rows with missing time are dropped.
+    block_size : int, default 65536
+        The number of rows per block of statistics.
+
+    Returns
+    -------
+     : TimeStore
+        The opened store.
+    """
+    if isinstance(data, pd.DataFrame):
+        data = [data.sort_values(time_col, kind='stable')]
+    created = not os.path.isdir(path)
+    os.makedirs(path, exist_ok=True)
+    specs, files, lookups = None, {}, {}
+    rows, dropped, last = 0, 0, None
+    try:
+        for chunk in data:
+            keep = chunk[time_col].notna().to_numpy()
+            dropped += int((~keep).sum())
+            chunk = chunk[keep]
+            if specs is None:
+                specs = [{'name': name, 'kind': column_kind(chunk[name]), 'file': f'column_{i}.bin',
+                          'tz': str(chunk[name].dt.tz) if column_kind(chunk[name])=='datetime' and chunk[name].dt.tz else None}
+                         for i, name in enumerate(chunk.columns)]
+                if [spec for spec in specs if spec['name']==time_col][0]['kind']!='datetime':
+                    raise ValueError(f"Column {time_col} is not in datetime datatype")
+                files = {spec['name']: open(os.path.join(path, spec['file']), 'wb') for spec in specs}
+                lookups = {spec['name']: {} for spec in specs if spec['kind']=='category'}
+            for spec in specs:
+                kind = column_kind(chunk[spec['name']])
+                if kind!=spec['kind'] and chunk[spec['name']].notna().any():
+                    raise ValueError(f"Column {spec['name']} changed from {spec['kind']} to {kind} kind, please provide its dtype")
+                values = disk_values(chunk[spec['name']], spec, lookups.get(spec['name']))
+                if spec['name']==time_col:
+                    if (len(values) and last is not None and values[0]<last) or (np.diff(values)<0).any():
+                        raise ValueError(f"Chunks are not sorted by {time_col}")
+                    if len(values):
+                        last = values[-1]
+                files[spec['name']].write(values.tobytes())
+            rows += len(chunk)
+    except BaseException:
+        # do not leave a partial store behind
+        for file in files.values():
+            file.close()
+            os.remove(file.name)
+        if created and not os.listdir(path):
+            os.rmdir(path)
+        raise
+    finally:
+        for file in files.values():
+            file.close()
+    if specs is None:
+        raise ValueError("No data to materialize")
+    for spec in specs:
+        if spec['kind']=='category':
+            spec['categories'] = [category.item() if isinstance(category, np.generic) else
+                                  category if isinstance(category, (str, int, float, bool)) else str(category)
+                                  for category in lookups[spec['name']]]
+    meta = {'rows': rows, 'dropped_rows': dropped, 'block_size': block_size, 'time_col': time_col,
+            'columns': specs, 'stats': {}}
+    for spec in specs:
+        if spec['kind'] in ('float', 'datetime') and rows:
+            values = np.memmap(os.path.join(path, spec['file']), mode='r', dtype=disk_dtype(spec['kind']), shape=(rows,))
+            meta['stats'][spec['name']] = block_stats(values, spec['kind'], block_size)
+            del values
+        elif spec['kind'] in ('float', 'datetime'):
+            meta['stats'][spec['name']] = {'min': [], 'max': []}
+    with open(os.path.join(path, 'meta.json'), 'w') as file:
+        json.dump(meta, file)
+    return TimeStore(path, meta)
+
+def disk_values(series, spec, lookup=None):
+    """
+    Convert a chunk of a column to its on-disk array. Please refer to TimeStore.
+
+    Parameters
+    ----------
+    series : Series
+        The chunk of the column.
+    spec : dict
+        The column spec with its kind.
+    lookup : dict, default None
+        For 'category' columns, the codes of the categories seen so far, updated in place.
+
+    Returns
+    -------
+     : ndarray
+        The on-disk values.
+    """
+    nulls = series.isna().to_numpy()
+    if nulls.all():
+        return np.full(len(series), {'float': np.nan, 'bool': -1, 'datetime': np.iinfo('int64').min,
+                                     'category': -1}[spec['kind']], dtype=disk_dtype(spec['kind']))
+    if spec['kind']=='float':
+        return series.to_numpy(dtype='float64', na_value=np.nan)
+    elif spec['kind']=='bool':
+        values = series.to_numpy(dtype=object, na_value=False).astype(bool).astype('int8')
+        values[nulls] = -1
+        return values
+    elif spec['kind']=='datetime':
+        if series.dt.tz is not None:
+            series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+        return series.to_numpy(dtype='datetime64[ns]').view('int64')
+    codes, uniques = pd.factorize(series)
+    mapping = np.array([lookup.setdefault(category, len(lookup)) for category in uniques] + [-1], dtype='int32')
+    return mapping[codes]
+
+def block_stats(values, kind, block_size):
+    """
+    Compute the min and max of each block of a 'float' or 'datetime' column, reading one block at a time.
+
+    Parameters
+    ----------
+    values : ndarray
+        The on-disk values of the column.
+    kind : str
+        The column kind.
+    block_size : int
+        The number of rows per block.
+
+    Returns
+    -------
+     : dict
+        The lists 'min' and 'max' with one entry per block, None for blocks without any value.
+    """
+    mins, maxs = [], []
+    for start in range(0, len(values), block_size):
+        block = np.asarray(values[start:start+block_size])
+        block = block[block!=np.iinfo('int64').min] if kind=='datetime' else block[~np.isnan(block)]
+        mins.append(block.min().item() if len(block) else None)
+        maxs.append(block.max().item() if len(block) else None)
+    return {'min': mins, 'max': maxs}
+
+def open_store(path):
+    """
+    Open a store written by materialize.
+
+    Parameters
+    ----------
+    path : str or path object
+        The directory of the store.
+
+    Returns
+    -------
+     : TimeStore
+        The opened store.
+    """
+    with open(os.path.join(path, 'meta.json')) as file:
+        return TimeStore(path, json.load(file))
@@ -0,0 +1,691 @@
+import copy
+import datetime
+import json
+import numpy as np
+import pandas as pd
+from collections import Counter
+from .utility import is_categorical, read_file
+from .instrument import instrumented
+
+class QuantileSketch:
+    """
+    Mergeable approximate quantile sketch built from a stack of compactors.
+
+    Values enter level 0 with weight 1. Whenever a level holds more than k values, it is sorted
+    and every other value is promoted to the next level with twice the weight. The rank error
+    is roughly proportional to log2(n/k)/k, and results are exact until the first compaction.
+
+    Parameters
+    ----------
+    k : int, default 2048
+        The maximum number of values held by each level.
+    seed : int, default 0
+        The seed of the random offsets used when compacting a level.
+    """
+    def __init__(self, k=2048, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """
+        Add the non-NaN values of an array to the sketch.
+
+        Parameters
+        ----------
+        values : array_like
+            The values to add.
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.compress()
+        return self
+
+    def merge(self, other):
+        """
+        Merge another sketch into this sketch.
+
+        Parameters
+        ----------
+        other : QuantileSketch
+            The sketch to merge.
+        """
+        while len(self.levels)<len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, values in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], values])
+        self.compress()
+        return self
+
+    def compress(self):
+        """
+        Compact every level that holds more than k values.
+        """
+        level = 0
+        while level<len(self.levels):
+            values = self.levels[level]
+            if len(values)>self.k:
+                values = np.sort(values)
+                # an odd value out stays at the current level
+                keep = values[len(values)-len(values)%2:]
+                promoted = values[self.rng.integers(2):len(values)-len(values)%2:2]
+                self.levels[level] = keep
+                if level+1==len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level+1] = np.concatenate([self.levels[level+1], promoted])
+            level += 1
+
+    def to_dict(self):
+        """
+        Get the state of the sketch as a JSON serializable dict. Please refer to from_dict.
+
+        Returns
+        -------
+         : dict
+            The state of the sketch.
+        """
+        return {'k': self.k, 'levels': [values.tolist() for values in self.levels],
+                'rng': self.rng.bit_generator.state}
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Restore a sketch from the dict of to_dict.
+
+        Parameters
+        ----------
+        state : dict
+            The state of the sketch.
+
+        Returns
+        -------
+         : QuantileSketch
+            The restored sketch.
+        """
+        res = cls(state['k'])
+        res.levels = [np.array(values, dtype=float) for values in state['levels']]
+        res.rng.bit_generator.state = state['rng']
+        return res
+
+    def count(self):
+        """
+        Get the total weight of the values in the sketch.
+
+        Returns
+        -------
+         : int
+            The number of values the sketch represents.
+        """
+        return sum(len(values)*2**level for level, values in enumerate(self.levels))
+
+    def quantile(self, q):
+        """
+        Get the approximate quantiles of the values added to the sketch.
+
+        Parameters
+        ----------
+        q : float or array_like
+            The quantiles to compute, in range [0, 1].
+
+        Returns
+        -------
+         : float or ndarray
+            The quantile values, NaN if the sketch is empty.
+        """
+        if all(len(values)==0 for values in self.levels[1:]):
+            # nothing has been compacted yet, so the quantiles are exact
+            if len(self.levels[0])==0:
+                return np.full(np.shape(q), np.nan)[()]
+            return np.quantile(self.levels[0], q)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(values), 2**level) for level, values in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values = values[order]
+        ranks = np.cumsum(weights[order])
+        targets = np.asarray(q, dtype=float)*(ranks[-1]-1)
+        return values[np.searchsorted(ranks, targets, side='right')]
+
+class ColumnAggregate:
+    """
+    Mergeable partial aggregate of a column that only tracks the null count.
+    """
+    def __init__(self):
+        self.nulls = 0
+
+    def update(self, series):
+        """
+        Add a chunk of the column to the aggregate.
+
+        Parameters
+        ----------
+        series : Series
+            The chunk of the column.
+        """
+        self.nulls += int(series.isnull().sum())
+        return self
+
+    def merge(self, other):
+        """
+        Merge another aggregate of the same column into this aggregate.
+
+        Parameters
+        ----------
+        other : ColumnAggregate
+            The aggregate to merge.
+        """
+        self.nulls += other.nulls
+        return self
+
+    def to_dict(self):
+        """
+        Get the state of the aggregate as a JSON serializable dict. Please refer to aggregate_from_dict.
+
+        Returns
+        -------
+         : dict
+            The state of the aggregate with its 'type'.
+        """
+        return {'type': 'column', 'nulls': self.nulls}
+
+class NumericAggregate(ColumnAggregate):
+    """
+    Mergeable partial aggregate of a numerical column: null count, count, mean and
+    sum of squared deviations (Welford's update, merged with Chan's formula), min, max
+    and a quantile sketch.
+    """
+    def __init__(self, k=2048):
+        super().__init__()
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.sketch = QuantileSketch(k)
+
+    def update(self, series):
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        nulls = np.isnan(values)
+        self.nulls += int(nulls.sum())
+        values = values[~nulls]
+        if len(values):
+            mean = values.mean()
+            self.combine(len(values), mean, ((values-mean)**2).sum(), values.min(), values.max())
+            self.sketch.update(values)
+        return self
+
+    def merge(self, other):
+        self.nulls += other.nulls
+        if other.count:
+            self.combine(other.count, other.mean, other.m2, other.min, other.max)
+            self.sketch.merge(other.sketch)
+        return self
+
+    def to_dict(self):
+        return {'type': 'numeric', 'nulls': self.nulls, 'count': self.count, 'mean': self.mean, 'm2': self.m2,
+                'min': float(self.min), 'max': float(self.max), 'sketch': self.sketch.to_dict()}
+
+    def combine(self, count, mean, m2, min, max):
+        """
+        Combine the moments of another set of values into the aggregate.
+
+        Parameters
+        ----------
+        count : int
+            The number of values.
+        mean : float
+            The mean of the values.
+        m2 : float
+            The sum of squared deviations from the mean of the values.
+        min : float
+            The min of the values.
+        max : float
+            The max of the values.
+        """
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta*count/total
+        self.m2 += m2 + delta**2*self.count*count/total
+        self.count = total
+        self.min = np.fmin(self.min, min)
+        self.max = np.fmax(self.max, max)
+
+    def std(self, ddof=1):
+        """
+        Get the standard deviation of the values.
+
+        Parameters
+        ----------
+        ddof : int, default 1
+            The delta degrees of freedom.
+
+        Returns
+        -------
+         : float
+            The standard deviation, NaN if there are not more than ddof values.
+        """
+        if self.count<=ddof:
+            return np.nan
+        return np.sqrt(self.m2/(self.count-ddof))
+
+    def describe(self):
+        """
+        Get the statistics in the order of DataFrame.describe plus range.
+
+        Returns
+        -------
+         : list
+            count, mean, std, min, 25%, 50%, 75%, max and range of the values.
+        """
+        if self.count==0:
+            return [0.0] + [np.nan]*8
+        quartiles = list(self.sketch.quantile([0.25, 0.5, 0.75]))
+        return [float(self.count), self.mean, self.std(), self.min] + quartiles + [self.max, self.max-self.min]
+
+class CategoricalAggregate(ColumnAggregate):
+    """
+    Mergeable partial aggregate of a categorical column: null count and the frequency of each category.
+    """
+    def __init__(self):
+        super().__init__()
+        self.counts = Counter()
+
+    def update(self, series):
+        self.nulls += int(series.isnull().sum())
+        counts = series.value_counts(dropna=True)
+        # category columns also count their unused categories
+        self.counts.update(counts[counts>0].to_dict())
+        return self
+
+    def merge(self, other):
+        self.nulls += other.nulls
+        self.counts.update(other.counts)
+        return self
+
+    def to_dict(self):
+        # JSON object keys are strings only, so the categories are kept as [category, count] pairs
+        return {'type': 'categorical', 'nulls': self.nulls,
+                'counts': [[json_value(category), count] for category, count in self.counts.items()]}
+
+    def value_counts(self):
+        """
+        Get the category counts like Series.value_counts, most frequent first.
+
+        Returns
+        -------
+         : Series
+            The Series with categories as index and category counts as values.
+        """
+        counts = pd.Series(dict(self.counts), dtype='int64')
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def distinct(self):
+        """
+        Get the number of category types, counting missing values as one type like Series.unique.
+
+        Returns
+        -------
+         : int
+            The number of category types.
+        """
+        return len(self.counts) + (self.nulls>0)
+
+def json_value(value):
+    """
+    Convert a category or a column name to a JSON serializable value. Strings, numbers and
+    booleans are kept as they are, timestamps, dates, timedeltas and tuples are tagged with
+    their type so that from_json_value restores them. Please refer to from_json_value.
+
+    Parameters
+    ----------
+    value : object
+        The category.
+
+    Returns
+    -------
+     : str, int, float, bool or dict
+        The serializable category, a dict of its 'type' and 'value' for tagged types.
+    """
+    if isinstance(value, np.generic) and not isinstance(value, (np.datetime64, np.timedelta64)):
+        value = value.item()
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (datetime.datetime, np.datetime64)):
+        return {'type': 'timestamp', 'value': pd.Timestamp(value).isoformat()}
+    if isinstance(value, datetime.date):
+        return {'type': 'date', 'value': value.isoformat()}
+    if isinstance(value, (datetime.timedelta, np.timedelta64)):
+        return {'type': 'timedelta', 'value': pd.Timedelta(value).value}
+    if isinstance(value, tuple):
+        return {'type': 'tuple', 'value': [json_value(item) for item in value]}
+    raise ValueError(f"Cannot save the category {value!r} of type {type(value).__name__}")
+
+def from_json_value(value):
+    """
+    Restore a category or a column name converted by json_value.
+
+    Parameters
+    ----------
+    value : str, int, float, bool or dict
+        The serializable category.
+
+    Returns
+    -------
+     : object
+        The category.
+    """
+    if not isinstance(value, dict):
+        return value
+    if value['type']=='timestamp':
+        return pd.Timestamp(value['value'])
+    elif value['type']=='date':
+        return datetime.date.fromisoformat(value['value'])
+    elif value['type']=='timedelta':
+        return pd.Timedelta(value['value'])
+    elif value['type']=='tuple':
+        return tuple(from_json_value(item) for item in value['value'])
+    raise ValueError("Wrong Parameter")
+
+def aggregate_from_dict(state):
+    """
+    Restore a column aggregate from the dict of its to_dict method.
+
+    Parameters
+    ----------
+    state : dict
+        The state of the aggregate.
+
+    Returns
+    -------
+     : ColumnAggregate
+        The restored aggregate.
+    """
+    if state['type']=='numeric':
+        res = NumericAggregate()
+        res.count, res.mean, res.m2 = state['count'], state['mean'], state['m2']
+        res.min, res.max = state['min'], state['max']
+        res.sketch = QuantileSketch.from_dict(state['sketch'])
+    elif state['type']=='categorical':
+        res = CategoricalAggregate()
+        res.counts = Counter({from_json_value(category): count for category, count in state['counts']})
+    elif state['type']=='column':
+        res = ColumnAggregate()
+    else:
+        raise ValueError("Wrong Parameter")
+    res.nulls = state['nulls']
+    return res
+
+def column_aggregate(series, k=2048):
+    """
+    Create the empty aggregate that fits the dtype of a column.
+
+    Parameters
+    ----------
+    series : Series
+        The column, or a chunk of it.
+    k : int, default 2048
+        The size of the quantile sketch of numerical columns. Please refer to QuantileSketch.
+
+    Returns
+    -------
+     : ColumnAggregate
+        CategoricalAggregate for categorical columns, NumericAggregate for numerical columns
+        and ColumnAggregate for the others.
+    """
+    if is_categorical(series.dtype):
+        return CategoricalAggregate()
+    elif pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return NumericAggregate(k)
+    return ColumnAggregate()
+
+class StreamProfile:
+    """
+    Mergeable profile of a DataFrame that is read chunk by chunk. Each chunk only updates
+    the partial aggregates of its columns, so the whole DataFrame never needs to be in memory.
+    The reports have the same layout as missing.missing_val_info, verify.num_var_info and
+    verify.cat_var_type_counts. The quartiles of num_var_info are approximate once a column
+    has more values than the sketch holds.
+
+    The profile of an append-only dataset can be saved, loaded later and updated with the new
+    rows only, which gives the same counts, moments, min/max and category frequencies as
+    profiling all the rows again.
+
+    Parameters
+    ----------
+    k : int, default 2048
+        The size of the quantile sketch of each numerical column. Please refer to QuantileSketch.
+    """
+    def __init__(self, k=2048):
+        self.k = k
+        self.rows = 0
+        self.columns = {}
+
+    def update(self, df):
+        """
+        Add a chunk of rows to the profile. A column that first appears in this chunk counts
+        the rows seen before as missing, and so does a known column absent from this chunk.
+
+        Parameters
+        ----------
+        df : DataFrame
+            The chunk of rows.
+        """
+        for column, aggregate in self.columns.items():
+            if column not in df.columns:
+                aggregate.nulls += len(df)
+        for column in df.columns:
+            aggregate = self.columns.get(column)
+            if aggregate is None:
+                aggregate = self.columns[column] = column_aggregate(df[column], self.k)
+                aggregate.nulls = self.rows
+            elif ((type(aggregate) is not CategoricalAggregate and is_categorical(df[column].dtype)
+                   and getattr(aggregate, 'count', 0)==0)
+                  or (type(aggregate) is CategoricalAggregate and not is_categorical(df[column].dtype)
+                      and not aggregate.counts)):
+                # the column only had missing values so far, so its dtype was not settled yet
+                new = column_aggregate(df[column], self.k)
+                new.nulls = aggregate.nulls
+                aggregate = self.columns[column] = new
+            elif type(aggregate) is NumericAggregate and is_categorical(df[column].dtype):
+                raise ValueError(f"Column {column} changed from numeric to object dtype, please provide its dtype")
+            elif (type(aggregate) is CategoricalAggregate and not is_categorical(df[column].dtype)
+                  and df[column].notna().any()):
+                # the values would be counted apart from the same values read as strings before
+                raise ValueError(f"Column {column} changed from object to {df[column].dtype} dtype, please provide its dtype")
+            aggregate.update(df[column])
+        self.rows += len(df)
+        return self
+
+    def merge(self, other):
+        """
+        Merge the profile of other rows of the same dataset into this profile. The columns that
+        only one of the profiles has count the rows of the other profile as missing.
+
+        Parameters
+        ----------
+        other : StreamProfile
+            The profile to merge.
+        """
+        for column, aggregate in self.columns.items():
+            if column not in other.columns:
+                aggregate.nulls += other.rows
+        for column, aggregate in other.columns.items():
+            if column in self.columns:
+                self.columns[column].merge(aggregate)
+            else:
+                # copied, so updating this profile does not change other
+                self.columns[column] = copy.deepcopy(aggregate)
+                self.columns[column].nulls += self.rows
+        self.rows += other.rows
+        return self
+
+    def to_dict(self):
+        """
+        Get the state of the profile as a JSON serializable dict. Please refer to from_dict.
+
+        Returns
+        -------
+         : dict
+            The state of the profile.
+        """
+        return {'k': self.k, 'rows': self.rows,
+                'columns': [[json_value(column), aggregate.to_dict()] for column, aggregate in self.columns.items()]}
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Restore a profile from the dict of to_dict.
+
+        Parameters
+        ----------
+        state : dict
+            The state of the profile.
+
+        Returns
+        -------
+         : StreamProfile
+            The restored profile.
+        """
+        res = cls(state['k'])
+        res.rows = state['rows']
+        res.columns = {from_json_value(column): aggregate_from_dict(aggregate) for column, aggregate in state['columns']}
+        return res
+
+    def save(self, path):
+        """
+        Save the profile to a JSON file. Please refer to load_profile.
+
+        Parameters
+        ----------
+        path : str or path object
+            The file to write.
+        """
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file)
+
+    def missing_val_info(self):
+        """
+        Show the DataFrame with the column has missing value as index and the missing counts
+        and missing percent of each column. Please refer to missing.missing_val_info.
+
+        Returns
+        -------
+        res : DataFrame
+            The DataFrame that reports missing values.
+        """
+        nulls = pd.Series({column: aggregate.nulls for column, aggregate in self.columns.items()}, dtype='int64')
+        res = pd.DataFrame({"Missing": nulls[nulls!=0]})
+        res['Missing Percent %'] = res['Missing']/self.rows
+        return res
+
+    def num_var_info(self):
+        """
+        Show statistics for all the numerical columns. Please refer to verify.num_var_info.
+
+        Returns
+        -------
+        res : DataFrame
+            The DataFrame with the numerical column name as title, and statistics as index.
+        """
+        return pd.DataFrame({column: aggregate.describe() for column, aggregate in self.columns.items()
+                             if type(aggregate) is NumericAggregate},
+                            index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max', 'range'])
+
+    def cat_var_type_counts(self):
+        """
+        Show how many categories are in each categorical column. Please refer to verify.cat_var_type_counts.
+
+        Returns
+        -------
+         : DataFrame
+            The DataFrame contains the categorical column names and the number of category types in each column.
+        """
+        report = [[column, aggregate.distinct()] for column, aggregate in self.columns.items()
+                  if type(aggregate) is CategoricalAggregate]
+        return pd.DataFrame(report, columns=['column_name', 'number_of_category_type'])
+
+    def value_counts(self, column):
+        """
+        Get the category counts of a categorical column like Series.value_counts.
+
+        Parameters
+        ----------
+        column : str
+            The name of the categorical column.
+
+        Returns
+        -------
+         : Series
+            The Series with categories as index and category counts as values, most frequent first.
+        """
+        aggregate = self.columns.get(column)
+        if type(aggregate) is not CategoricalAggregate:
+            raise ValueError(f"Column {column} is not a categorical column of the profile")
+        counts = aggregate.value_counts()
+        counts.name = 'count'
+        counts.index.name = column
+        return counts
+
+    def cat_counts_sort(self, column, row_index_start=0, row_index_end=10, orderby="frequency", ascending=True):
+        """
+        Show the category counts of a categorical column in frequency order or alphabetic order
+        in the given index range. Please refer to verify.cat_counts_sort.
+
+        Returns
+        -------
+         : Series
+            The Series with categories as index and category counts as values in the given index range
+            sorted by the given order.
+        """
+        from .verify import cat_counts_sort
+        return cat_counts_sort(None, column, row_index_start, row_index_end, orderby, ascending, prof=self)
+
+def load_profile(path):
+    """
+    Load a profile saved by StreamProfile.save, e.g. to update it with newly appended rows.
+
+    Parameters
+    ----------
+    path : str or path object
+        The file to read.
+
+    Returns
+    -------
+     : StreamProfile
+        The loaded profile.
+    """
+    with open(path) as file:
+        return StreamProfile.from_dict(json.load(file))
+
+@instrumented
+def stream_profile(path, chunksize=100000, sep=',', orient=None, dtype=None, prof=None):
+    """
+    Profile a CSV or line-delimited JSON file chunk by chunk, without loading the whole file into memory.
+
+    Parameters
+    ----------
+    path : str, path object, or file-like object
+        The file path to access file to read from current directory. The string could also be URL.
+    chunksize : int, default 100000
+        The number of rows to read per chunk.
+    sep : str, default ','
+        Delimiter to use for CSV file.
+    orient : str, default None
+        Indication of expected JSON string format. Line-delimited JSON only supports 'records'.
+    dtype : dict, default None
+        The dtype of columns for CSV file. Columns with a few malformed values can otherwise be
+        read as numeric in one chunk and as object in another.
+    prof : StreamProfile, default None
+        The profile of the rows seen before, updated in place with the rows of the file,
+        e.g. the profile of a dataset before a new partition was appended.
+
+    Returns
+    -------
+     : StreamProfile
+        The profile of all the rows in the file, and of the rows of prof if provided.
+    """
+    res = StreamProfile() if prof is None else prof
+    for chunk in read_file(path, sep=sep, orient=orient, chunksize=chunksize, dtype=dtype):
+        res.update(chunk)
+    return res
@@ -1,8 +1,12 @@
+import json
 import numpy as np
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 import re
+from . import render
+from .instrument import instrumented, stage
+
+# "yyyy-mm-dd" anywhere in a string
+date_pattern = re.compile(r"(\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12][0-9]|3[01]))")
 
 def trim_date(string):
     """
@@ -18,15 +22,17 @@ def trim_date(string):
      : str
         The "yyyy-mm-dd" format string.
     """
-    search = re.search("\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])", string)
+    search = date_pattern.search(string)
     if search!=None:
         return search.group(0)
     else:
         return None 
 
-def parse_date(df, column):
+@instrumented
+def parse_date(df, column, format=None, timestamps=False, utc=False):
     """
     Given a DataFrame column that contains "yyyy-mm-dd" format strings. Parse this column to date_time format. 
+    Each distinct string is only parsed once.
 
     Parameters
     ----------
@@ -34,8 +40,37 @@ def parse_date(df, column):
         The input DataFrame
     column : str
         The column name contains date format string.
+    format : str, default None
+        The strftime format of the whole string, e.g. '%d/%m/%Y %H:%M'. If provided, the strings are
+        parsed with it directly instead of extracting the "yyyy-mm-dd" part.
+    timestamps : bool, default False
+        If True and format is not provided, parse the whole strings as ISO 8601 timestamps, 
+        e.g. '2021-03-04T05:06:07+08:00', instead of extracting the "yyyy-mm-dd" part.
+    utc : bool, default False
+        If True, convert the timestamps to UTC. Needed for timestamps with different time zone offsets.
+
+    Returns
+    -------
+    unparseable : int
+        The number of non-missing rows that could not be parsed and became NaT.
     """
-    df[column] = pd.to_datetime(df[column].apply(trim_date))
+    with stage('factorize', len(df)):
+        codes, uniques = pd.factorize(df[column])
+        uniques = pd.Series(uniques, dtype=object)
+    with stage('parse', len(uniques)):
+        if format is None and not timestamps:
+            uniques = uniques.str.extract(date_pattern, expand=False)
+            format = '%Y-%m-%d'
+        elif format is None:
+            format = 'ISO8601'
+        parsed = pd.to_datetime(uniques, format=format, errors='coerce', utc=utc)
+    with stage('map', len(df)):
+        df[column] = pd.Series(parsed.array.take(codes, allow_fill=True), index=df.index)
+    failed = np.flatnonzero(parsed.isna().to_numpy())
+    unparseable = int(np.isin(codes, failed).sum())
+    if unparseable:
+        print(f'Unparseable rows in {column}: {unparseable}')
+    return unparseable
 # helper function for all the functions below
 def get_unit(unit="day"):
     """
@@ -53,7 +88,9 @@ def get_unit(unit="day"):
         'hour' : the hour of the datetime object.
         'minute' : the minute of the datetime object.
         'day_of_week' : the day in week of the datetime object, range in [0, 6].
-        'day_of_year' : the day in year of the datetime object, range in [0, 355].
+        'day_of_year' : the day in year of the datetime object, range in [1, 366].
+        'week' : the ISO week of year of the datetime object, range in [1, 53].
+        'quarter' : the quarter of the datetime object, range in [1, 4].
 
     Returns
     -------
@@ -74,51 +111,514 @@ def get_unit(unit="day"):
         get_time = lambda x:x.day_of_week
     elif unit=="day_of_year":
         get_time = lambda x:x.day_of_year
+    elif unit=="week":
+        get_time = lambda x:x.week
+    elif unit=="quarter":
+        get_time = lambda x:x.quarter
     else:
         raise ValueError("Wrong Parameter")
     return get_time
 
+def unit_values(series, unit="day"):
+    """
+    For a given datetime Series, get the corresponding unit value of every element at once 
+    through the .dt accessor, instead of applying the get_unit function element by element.
+
+    Parameters
+    ----------
+    series : Series
+        The Series in datetime datatype.
+    unit : str, default 'day'
+        Please refer to the get_unit function.
+
+    Returns
+    -------
+     : Series
+        The unit values with the same index as series. Missing datetimes give missing values.
+    """
+    if unit=="week":
+        return series.dt.isocalendar().week
+    fields = {"year": "year", "month": "month", "day": "day", "hour": "hour", "minute": "minute",
+              "day_of_week": "dayofweek", "day_of_year": "dayofyear", "quarter": "quarter"}
+    if unit not in fields:
+        raise ValueError("Wrong Parameter")
+    return getattr(series.dt, fields[unit])
+
+@instrumented
 def time_dist(df, column, unit="day"):
     """
     For a given column that is in datetime datatype, plot the time distribution in the given unit.
 
     Parameters
     ----------
-    df : DataFrame
-        The data frame that contains target datetime column.
+    df : DataFrame or TimeStore
+        The data frame that contains target datetime column. 
+        For a TimeStore, only the target column is read from disk.
     column: str
         The column name of the target datetime column.
     unit : str, default 'day'
         Please refer to the get_unit function.
     """
-    get_time = get_unit(unit)
-    sns.histplot(x=df[column].apply(get_time))
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+    # count the unit values first, the plot is drawn from one bar per unit
+    with stage('reduce', len(df)):
+        units, counts = render.unit_counts(unit_values(df[column], unit))
+    with stage('render', len(units)):
+        sns.histplot(x=units, weights=counts, discrete=True)
     plt.title(f"time distribution in {unit}")
     plt.xlabel(unit)
     plt.show()
 
-def time_dist_along(df, column, time_col, unit="day"):
+@instrumented
+def time_dist_along(df, column, time_col, unit="day", max_points=100000):
     """
     For a given datetime column and a numerical column, plot the 
     time distribution in the given unit along the numeric column.
 
     Parameters
     ----------
-    df : DataFrame
+    df : DataFrame or TimeStore
         The data frame that contains target datetime column.
+        For a TimeStore, only the two columns are read from disk.
     column : str
         The column name of the numerical column.
     time_col: str
         The column name of the target datetime column.
     unit : str, default 'day'
         Please refer to the get_unit function.
+    max_points : int, default 100000
+        With more rows than max_points, the points are reduced to one point per unit and bin of
+        the numerical column, sized by the number of rows in it. Please refer to render.bin_points.
     """
-    get_time = get_unit(unit)
-    sns.relplot(x=df[time_col].apply(get_time), y=df[column], aspect=1.5)
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+    with stage('reduce', len(df)):
+        x, y = unit_values(df[time_col], unit), df[column]
+        if len(y)>max_points:
+            points = render.bin_points(x.to_numpy(dtype=float, na_value=np.nan), y.to_numpy(dtype=float, na_value=np.nan))
+    if len(y)<=max_points:
+        with stage('render', len(y)):
+            sns.relplot(x=x, y=y, aspect=1.5)
+    else:
+        with stage('render', len(points)):
+            sns.relplot(data=points, x='x', y='y', size='count', aspect=1.5)
+        plt.ylabel(column)
     plt.title(f'{unit} distribution along {column}')
     plt.xlabel(unit)
 
-def agg_time_along(df, column, time_col, start, end, agg_unit="day_of_year"):
+def time_bound(value, tz):
+    """
+    Convert the start or end of a time interval to a Timestamp that can be compared with 
+    a datetime column. For a time zone aware column, a time without time zone is taken as UTC.
+
+    Parameters
+    ----------
+    value : str or Timestamp
+        The start or end of the time interval.
+    tz : tzinfo or None
+        The time zone of the datetime column.
+
+    Returns
+    -------
+     : Timestamp
+        The time in the time zone of the column, or without time zone if the column has none.
+    """
+    value = pd.Timestamp(value)
+    if tz is not None:
+        return (value.tz_localize('UTC') if value.tz is None else value).tz_convert(tz)
+    return value if value.tz is None else value.tz_convert('UTC').tz_localize(None)
+
+def time_range(times, start=None, end=None):
+    """
+    Get the positions of the rows whose time is in [start, end]. If the times are sorted, 
+    the interval is found by binary search and returned as a slice, without scanning the column.
+
+    Parameters
+    ----------
+    times : Series
+        The Series in datetime datatype.
+    start : str or Timestamp, default None
+        The start time of the interval, no lower bound if None.
+    end : str or Timestamp, default None
+        The end time of the interval, no upper bound if None.
+
+    Returns
+    -------
+     : slice or ndarray
+        The positions of the rows in the interval. Rows with missing time are left out.
+    """
+    start = None if start is None else time_bound(start, times.dt.tz)
+    end = None if end is None else time_bound(end, times.dt.tz)
+    if times.is_monotonic_increasing and not times.hasnans:
+        low = 0 if start is None else times.searchsorted(start, side='left')
+        high = len(times) if end is None else times.searchsorted(end, side='right')
+        return slice(low, high)
+    keep = times.notna().to_numpy()
+    if start is not None:
+        keep &= (times>=start).to_numpy()
+    if end is not None:
+        keep &= (times<=end).to_numpy()
+    return np.flatnonzero(keep)
+
+def group_reduce(codes, values, size, how="mean", q=0.5):
+    """
+    Aggregate values by group codes with array kernels instead of a groupby.
+
+    Parameters
+    ----------
+    codes : ndarray
+        The group code of each value, in range [0, size). Every code has at least one value.
+    values : ndarray
+        The float values, missing values as NaN. Missing values are left out of every aggregation.
+    size : int
+        The number of groups.
+    how : str, default 'mean'
+        The aggregation. The set of possible how is 'mean', 'sum', 'count', 'min', 'max' and 'quantile'.
+    q : float, default 0.5
+        The quantile to compute for 'quantile', in range [0, 1]. Linear interpolation is used.
+
+    Returns
+    -------
+     : ndarray
+        The aggregated value of each group.
+    """
+    nulls = np.isnan(values)
+    count = np.bincount(codes[~nulls], minlength=size)
+    if how=="count":
+        return count
+    elif how in ("sum", "mean"):
+        total = np.bincount(codes, weights=np.where(nulls, 0, values), minlength=size)
+        if how=="sum":
+            return total
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return total/count
+    elif how in ("min", "max"):
+        order = np.argsort(codes, kind='stable')
+        starts = np.searchsorted(codes[order], np.arange(size))
+        fill = np.inf if how=="min" else -np.inf
+        reduce = np.minimum if how=="min" else np.maximum
+        res = reduce.reduceat(np.where(nulls, fill, values)[order], starts)
+        res[count==0] = np.nan
+        return res
+    elif how=="quantile":
+        # sort by group then value, missing values go to the end of their group
+        order = np.lexsort((values, codes))
+        starts = np.searchsorted(codes[order], np.arange(size))
+        ordered = values[order]
+        positions = starts + q*np.maximum(count-1, 0)
+        below = np.floor(positions).astype(int)
+        above = np.minimum(below+1, starts+np.maximum(count-1, 0))
+        with np.errstate(invalid='ignore'):
+            res = ordered[below] + (ordered[above]-ordered[below])*(positions-below)
+        res[count==0] = np.nan
+        return res
+    else:
+        raise ValueError("Wrong Parameter")
+
+@instrumented
+def agg_time(df, column, time_col, start=None, end=None, unit="day_of_year", how="mean", q=0.5, rollup=None):
+    """
+    In the given time interval, group the numeric column by the given unit of the datetime column
+    and aggregate it. The rows in the interval are found by binary search if the datetime column is sorted,
+    and the groups are aggregated with group_reduce.
+
+    Parameters
+    ----------
+    df : DataFrame or TimeStore
+        The DataFrame that contains the datetime column and numerical column. For a TimeStore,
+        only the rows in the time interval are read from disk.
+    column : str
+        The column name of the numerical column.
+    time_col : str
+        The column name of the datetime column.
+    start : str, default None
+        The string in datetime format that indicates the start time of the selected time interval.
+    end : str, default None
+        The string in datetime format that indicates the end time of the selected time interval.
+    unit : str, default 'day_of_year'
+        The unit to group by. Please refer to get_unit for potential values.
+    how : str, default 'mean'
+        The aggregation. Please refer to group_reduce for potential values.
+    q : float, default 0.5
+        The quantile to compute if how is 'quantile'.
+    rollup : TimeRollup, default None
+        The pre-aggregated rollup of the same columns. If it can answer the query exactly, 
+        the result is computed from its buckets instead of the rows of df. The rows of df are used
+        if df no longer has the row count and the first and last time the rollup was built from.
+
+    Returns
+    -------
+     : Series
+        The aggregated values with the unit values as index.
+    """
+    if rollup is not None and rollup.column==column and rollup.time_col==time_col and rollup.matches(df):
+        res = rollup.agg(start, end, unit, how)
+        if res is not None:
+            return res
+    from .store import TimeStore
+    if isinstance(df, TimeStore):
+        df = df.query(start, end, [time_col, column])
+    rows = time_range(df[time_col], start, end)
+    keys = unit_values(df[time_col].iloc[rows], unit).to_numpy(dtype='int64')
+    values = df[column].iloc[rows].to_numpy(dtype=float, na_value=np.nan)
+    if len(keys)==0:
+        return pd.Series([], index=pd.Index([], dtype='int64', name=unit), name=column, dtype=float)
+    codes = keys - keys.min()
+    present = np.bincount(codes)>0
+    groups = np.cumsum(present)-1
+    res = group_reduce(groups[codes], values, present.sum(), how, q)
+    return pd.Series(res, index=pd.Index(np.flatnonzero(present)+keys.min(), name=unit), name=column)
+
+class TimeRollup:
+    """
+    Pre-aggregated buckets of a numerical column along a datetime column at several resolutions, 
+    e.g. minute, hour and day. Each bucket keeps the row count, value count, sum, min and max,
+    so mean, sum, count, min and max can be aggregated again from the buckets instead of the rows.
+    Buckets of a time zone aware column are taken in its local time. Please refer to build_rollup.
+
+    Parameters
+    ----------
+    column : str
+        The column name of the numerical column.
+    time_col : str
+        The column name of the datetime column.
+    tz : str or None
+        The time zone of the datetime column.
+    tables : dict
+        The buckets of each resolution, from the finest to the coarsest, as a dict of arrays 
+        'start' (bucket start in nanoseconds of local time), 'rows', 'count', 'sum', 'min' and 'max'.
+    source : tuple, default None
+        The row count and the first and last time of the rows the rollup was built from.
+        Please refer to time_extent. A rollup without it never matches a DataFrame.
+    """
+    def __init__(self, column, time_col, tz, tables, source=None):
+        self.column = column
+        self.time_col = time_col
+        self.tz = tz
+        self.tables = tables
+        self.source = None if source is None else tuple(source)
+
+    def matches(self, df):
+        """
+        Check whether a DataFrame or TimeStore still has the row count and the first and last time
+        of the rows the rollup was built from, so the buckets can stand for its rows. Rows changed
+        in place without changing these are not detected.
+
+        Parameters
+        ----------
+        df : DataFrame or TimeStore
+            The data the rollup is used for.
+
+        Returns
+        -------
+         : bool
+            True if the rollup was built from the same rows.
+        """
+        return self.source is not None and time_extent(df, self.time_col)==self.source
+
+    def agg(self, start=None, end=None, unit="day_of_year", how="mean"):
+        """
+        Aggregate the buckets of the coarsest resolution that answers the query exactly. 
+        A resolution answers the query if it can express the unit and no bucket with rows 
+        crosses start or end.
+
+        Parameters
+        ----------
+        start : str, default None
+            The start time of the interval, no lower bound if None.
+        end : str, default None
+            The end time of the interval, no upper bound if None.
+        unit : str, default 'day_of_year'
+            The unit to group by. Please refer to get_unit for potential values.
+        how : str, default 'mean'
+            The aggregation, one of 'mean', 'sum', 'count', 'min' and 'max'.
+
+        Returns
+        -------
+         : Series or None
+            The aggregated values with the unit values as index, 
+            None if no resolution answers the query exactly.
+        """
+        if how not in ("mean", "sum", "count", "min", "max"):
+            return None
+        finest = {"minute": pd.Timedelta("1min"), "hour": pd.Timedelta("1h")}.get(unit, pd.Timedelta("1D"))
+        low = -np.inf if start is None else time_bound(start, self.tz).tz_localize(None).value
+        high = np.inf if end is None else time_bound(end, self.tz).tz_localize(None).value
+        for freq in reversed(list(self.tables)):
+            step = freq_step(freq)
+            if step>finest.value:
+                continue
+            table = self.tables[freq]
+            inside = (table['start']>=low) & (table['start']+step-1<=high)
+            if (~inside & (table['start']+step-1>=low) & (table['start']<=high)).any():
+                continue
+            keys = unit_values(pd.Series(pd.to_datetime(table['start'][inside])), unit).to_numpy(dtype='int64')
+            if len(keys)==0:
+                return pd.Series([], index=pd.Index([], dtype='int64', name=unit), name=self.column, dtype=float)
+            codes = keys - keys.min()
+            present = np.bincount(codes)>0
+            codes = (np.cumsum(present)-1)[codes]
+            size = present.sum()
+            count = np.bincount(codes, weights=table['count'][inside], minlength=size)
+            if how=="count":
+                res = count.astype('int64')
+            elif how in ("sum", "mean"):
+                res = np.bincount(codes, weights=table['sum'][inside], minlength=size)
+                if how=="mean":
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        res = res/count
+            else:
+                res = group_reduce(codes, table[how][inside], size, how)
+            return pd.Series(res, index=pd.Index(np.flatnonzero(present)+keys.min(), name=unit), name=self.column)
+        return None
+
+    def save(self, path):
+        """
+        Persist the rollup to a .npz file. Please refer to load_rollup.
+
+        Parameters
+        ----------
+        path : str or path object
+            The file path to write.
+        """
+        arrays = {f'{freq}/{name}': values for freq, table in self.tables.items() for name, values in table.items()}
+        meta = {'column': self.column, 'time_col': self.time_col, 'tz': self.tz, 'freqs': list(self.tables),
+                'source': self.source}
+        np.savez(path, meta=np.array(json.dumps(meta)), **arrays)
+
+def time_extent(df, time_col):
+    """
+    Get the row count and the first and last time of a DataFrame or TimeStore. For a TimeStore,
+    the times come from the block statistics, so no row is read.
+
+    Parameters
+    ----------
+    df : DataFrame or TimeStore
+        The data that contains the datetime column.
+    time_col : str
+        The column name of the datetime column.
+
+    Returns
+    -------
+     : tuple
+        The row count, and the first and last time in nanoseconds since epoch in UTC,
+        or None if the column has no time.
+    """
+    from .store import TimeStore
+    if isinstance(df, TimeStore):
+        stats = df.meta['stats'][time_col]
+        mins = [value for value in stats['min'] if value is not None]
+        maxs = [value for value in stats['max'] if value is not None]
+        return len(df), min(mins) if mins else None, max(maxs) if maxs else None
+    times = df[time_col]
+    first, last = times.min(), times.max()
+    return len(df), None if pd.isna(first) else first.value, None if pd.isna(last) else last.value
+
+def freq_step(freq):
+    """
+    Get the width of a fixed frequency such as 'min', 'h' or '15min' in nanoseconds.
+
+    Parameters
+    ----------
+    freq : str
+        The fixed frequency.
+
+    Returns
+    -------
+     : int
+        The width in nanoseconds.
+    """
+    return pd.Timedelta(pd.tseries.frequencies.to_offset(freq)).value
+
+def reduce_buckets(starts, rows, count, total, low, high):
+    """
+    Merge consecutive entries with the same sorted bucket start into one bucket.
+
+    Parameters
+    ----------
+    starts : ndarray
+        The sorted bucket start of each entry.
+    rows, count, total, low, high : ndarray
+        The row count, value count, sum, min and max of each entry.
+
+    Returns
+    -------
+     : dict
+        The arrays 'start', 'rows', 'count', 'sum', 'min' and 'max' with one entry per bucket.
+    """
+    first = np.flatnonzero(np.r_[True, starts[1:]!=starts[:-1]]) if len(starts) else np.empty(0, dtype=int)
+    if len(first)==0:
+        return {'start': starts[:0], 'rows': rows[:0], 'count': count[:0], 'sum': total[:0], 'min': low[:0], 'max': high[:0]}
+    return {'start': starts[first], 'rows': np.add.reduceat(rows, first), 'count': np.add.reduceat(count, first),
+            'sum': np.add.reduceat(total, first), 'min': np.fmin.reduceat(low, first), 'max': np.fmax.reduceat(high, first)}
+
+@instrumented
+def build_rollup(df, column, time_col, freqs=("min", "h", "D")):
+    """
+    Pre-aggregate a numerical column along a datetime column at several resolutions. 
+    The finest resolution is computed from the rows, each coarser one from the previous one.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The DataFrame that contains the datetime column and numerical column.
+    column : str
+        The column name of the numerical column.
+    time_col : str
+        The column name of the datetime column.
+    freqs : tuple of str, default ('min', 'h', 'D')
+        The fixed bucket widths from the finest to the coarsest, each one a multiple of the previous one.
+
+    Returns
+    -------
+     : TimeRollup
+        The rollup that agg_time and agg_time_along can aggregate from.
+    """
+    steps = [freq_step(freq) for freq in freqs]
+    if any(coarse%fine for fine, coarse in zip(steps[:-1], steps[1:])):
+        raise ValueError("Wrong Parameter")
+    times = df[time_col]
+    tz = times.dt.tz
+    keep = times.notna().to_numpy()
+    if tz is not None:
+        times = times.dt.tz_localize(None)
+    ns = times.to_numpy(dtype='datetime64[ns]')[keep].view('int64')
+    values = df[column].to_numpy(dtype=float, na_value=np.nan)[keep]
+    starts = ns//steps[0]*steps[0]
+    order = np.argsort(starts, kind='stable')
+    starts, values = starts[order], values[order]
+    nulls = np.isnan(values)
+    table = reduce_buckets(starts, np.ones(len(values), dtype='int64'), (~nulls).astype('int64'),
+                           np.where(nulls, 0, values), values, values)
+    tables = {freqs[0]: table}
+    for freq, step in zip(freqs[1:], steps[1:]):
+        table = reduce_buckets(table['start']//step*step, table['rows'], table['count'], table['sum'], table['min'], table['max'])
+        tables[freq] = table
+    return TimeRollup(column, time_col, None if tz is None else str(tz), tables, time_extent(df, time_col))
+
+def load_rollup(path):
+    """
+    Load a rollup persisted by TimeRollup.save.
+
+    Parameters
+    ----------
+    path : str or path object
+        The .npz file path.
+
+    Returns
+    -------
+     : TimeRollup
+        The loaded rollup.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data['meta']))
+        tables = {freq: {name: data[f'{freq}/{name}'] for name in ('start', 'rows', 'count', 'sum', 'min', 'max')}
+                  for freq in meta['freqs']}
+    return TimeRollup(meta['column'], meta['time_col'], meta['tz'], tables, meta.get('source'))
+
+@instrumented
+def agg_time_along(df, column, time_col, start, end, agg_unit="day_of_year", how="mean", rollup=None):
     """    
     For a given DataFrame contains datetime column and another numeric column, in the given time interval, 
     groupby the datetime column with the given unit and aggregate the numeric column by mean value, 
@@ -126,8 +626,9 @@ def agg_time_along(df, column, time_col, start, end, agg_unit="day_of_year"):
 
     Parameters
     ----------
-    df : DataFrame
+    df : DataFrame or TimeStore
         The DataFrame that contains the datetime column and numerical column.
+        For a TimeStore, only the rows in the time interval are read from disk.
     column : str
         The column name of the numerical column.
     time_col : str
@@ -139,13 +640,11 @@ def agg_time_along(df, column, time_col, start, end, agg_unit="day_of_year"):
     agg_unit : str
         The unit of the datetime column to aggregate and plot distribution. 
         Please refer to get_unit for potential values.
+    how : str, default 'mean'
+        The aggregation. Please refer to group_reduce for potential values.
+    rollup : TimeRollup, default None
+        The pre-aggregated rollup to aggregate from when possible. Please refer to agg_time.
     """
-    start = pd.to_datetime(start, utc=True)
-    end = pd.to_datetime(end, utc=True)
-    idx = df[time_col][(df[time_col]>=start) & (df[time_col]<=end)].index
-    new_df = df[[time_col, column]].copy()
-    
-    get_time = get_unit(agg_unit)
-    new_df.loc[:,agg_unit] = df[time_col].apply(get_time)
-
-    sns.lineplot(x=new_df.loc[idx,[agg_unit,column]].groupby([agg_unit]).mean()[column].index, y=new_df.loc[idx,[agg_unit,column]].groupby([agg_unit]).mean()[column])
\ No newline at end of file
+    import seaborn as sns
+    res = agg_time(df, column, time_col, start, end, agg_unit, how, rollup=rollup)
+    sns.lineplot(x=res.index, y=res)
@@ -1,13 +1,69 @@
+import math
 import numpy as np
 import pandas as pd
 import string
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import CountVectorizer
-from nltk.corpus import stopwords
+from .instrument import instrumented, stage
+from .cache import cached
 
-stopwords = stopwords.words('english')
+# copy of the NLTK English stopword list, used when the NLTK corpus is not available
+english_stopwords = (
+    "i", "me", "my", "myself", "we", "our", "ours", "ourselves", "you", "you're", "you've", "you'll",
+    "you'd", "your", "yours", "yourself", "yourselves", "he", "him", "his", "himself", "she", "she's",
+    "her", "hers", "herself", "it", "it's", "its", "itself", "they", "them", "their", "theirs",
+    "themselves", "what", "which", "who", "whom", "this", "that", "that'll", "these", "those", "am",
+    "is", "are", "was", "were", "be", "been", "being", "have", "has", "had", "having", "do", "does",
+    "did", "doing", "a", "an", "the", "and", "but", "if", "or", "because", "as", "until", "while",
+    "of", "at", "by", "for", "with", "about", "against", "between", "into", "through", "during",
+    "before", "after", "above", "below", "to", "from", "up", "down", "in", "out", "on", "off", "over",
+    "under", "again", "further", "then", "once", "here", "there", "when", "where", "why", "how", "all",
+    "any", "both", "each", "few", "more", "most", "other", "some", "such", "no", "nor", "not", "only",
+    "own", "same", "so", "than", "too", "very", "s", "t", "can", "will", "just", "don", "don't",
+    "should", "should've", "now", "d", "ll", "m", "o", "re", "ve", "y", "ain", "aren", "aren't",
+    "couldn", "couldn't", "didn", "didn't", "doesn", "doesn't", "hadn", "hadn't", "hasn", "hasn't",
+    "haven", "haven't", "isn", "isn't", "ma", "mightn", "mightn't", "mustn", "mustn't", "needn",
+    "needn't", "shan", "shan't", "shouldn", "shouldn't", "wasn", "wasn't", "weren", "weren't", "won",
+    "won't", "wouldn", "wouldn't",
+)
+loaded_stopwords = None
 
-def read_file(path, sep=',', orient=None):
+def stopword_list():
+    """
+    Read the English stopword list from the NLTK corpus if it is installed, 
+    otherwise use the bundled copy english_stopwords.
+
+    Returns
+    -------
+     : list
+        The English stopwords.
+    """
+    try:
+        from nltk.corpus import stopwords
+        return stopwords.words('english')
+    except (ImportError, LookupError):
+        return list(english_stopwords)
+
+def get_stopwords():
+    """
+    Load the English stopword set on first use. Please refer to stopword_list.
+
+    Returns
+    -------
+     : frozenset
+        The English stopwords.
+    """
+    global loaded_stopwords
+    if loaded_stopwords is None:
+        loaded_stopwords = frozenset(stopword_list())
+    return loaded_stopwords
+
+def __getattr__(name):
+    # utility.stopwords used to be the NLTK list loaded at import time
+    if name=='stopwords':
+        return stopword_list()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@instrumented
+def read_file(path, sep=',', orient=None, chunksize=None, dtype=None):
     """
     Read CSV file into DataFrame. Also supports reading JSON file, if orient is provided.
 
@@ -24,19 +80,99 @@ def read_file(path, sep=',', orient=None):
         'index' : dict like {index -> {column -> value}}
         'columns' : dict like {column -> {index -> value}}
         'values' : just the values array
+    chunksize : int, default None
+        If provided, return an iterator of DataFrames with chunksize rows each instead of 
+        reading the whole file. JSON file has to be line-delimited with 'records' orient.
+    dtype : type name or dict of column -> type, default None
+        Data type for data or columns.
     
     Returns
     -------
-     : DataFrame or Series
+     : DataFrame, Series or iterator of DataFrame
         The DataFrame or Series contains the data in the input file.
     """
-    if path[-4:]=='.csv':
-        return pd.read_csv(path, sep)
-    elif path[-5:]=='.json':
-        return pd.read_json(path, orient)
+    path_name = str(path)
+    if path_name[-4:]=='.csv':
+        return pd.read_csv(path, sep=sep, chunksize=chunksize, dtype=dtype)
+    elif path_name[-5:]=='.json':
+        if chunksize is not None:
+            if orient not in (None, 'records'):
+                raise ValueError("Chunked JSON reading only supports 'records' orient")
+            return pd.read_json(path, orient='records', lines=True, chunksize=chunksize, dtype=dtype)
+        return pd.read_json(path, orient=orient, dtype=dtype)
     else:
         raise ValueError("Unrecognized file type")
 
+def is_categorical(dtype):
+    """
+    Check whether a column dtype holds categories: object, category, or pandas string dtypes.
+    Please refer to compact.
+
+    Parameters
+    ----------
+    dtype : dtype
+        The dtype of the column.
+
+    Returns
+    -------
+     : bool
+        True for categorical dtypes.
+    """
+    return dtype==object or isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype))
+
+@instrumented
+def compact(df, max_category_ratio=0.5, arrow=False):
+    """
+    Shrink the memory of a DataFrame. Integer columns are downcast to the smallest integer type
+    that holds their min and max, float64 columns to float32 when all their values are exactly
+    representable, and object columns of strings with few distinct values to category.
+    The verify, missing and utility functions work on the compacted columns as they are.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The input DataFrame.
+    max_category_ratio : float, default 0.5
+        The largest ratio of distinct values to rows for a string column to become category.
+    arrow : bool, default False
+        Whether to convert the other string columns to Arrow-backed strings, 'string[pyarrow]'.
+        Requires pyarrow.
+
+    Returns
+    -------
+     : tuple
+        The compacted DataFrame, and the DataFrame with the 'before' and 'after' dtypes and
+        'memory_before' and 'memory_after' bytes of each column, with a 'total' row.
+    """
+    res = df.copy(deep=False)
+    for column in res.columns:
+        series = res[column]
+        if series.dtype.kind in 'iu':
+            if len(series):
+                res[column] = pd.to_numeric(series, downcast='unsigned' if series.min()>=0 else 'integer')
+        elif series.dtype==np.float64:
+            values = series.to_numpy()
+            narrow = values.astype(np.float32)
+            # only downcast if float32 keeps every value exactly
+            if ((narrow==values) | np.isnan(values)).all():
+                res[column] = narrow
+        elif series.dtype==object:
+            if pd.api.types.infer_dtype(series, skipna=True)!='string':
+                continue
+            if series.nunique()<=max_category_ratio*len(series):
+                res[column] = series.astype('category')
+            elif arrow:
+                res[column] = series.astype('string[pyarrow]')
+    before = df.memory_usage(deep=True, index=False)
+    after = res.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({'before': df.dtypes.astype(str), 'after': res.dtypes.astype(str),
+                           'memory_before': before, 'memory_after': after})
+    report.loc['total'] = ['', '', before.sum(), after.sum()]
+    return res, report
+
+# table for str.translate that deletes all the punctuation characters
+punctuation_table = str.maketrans('', '', string.punctuation)
+
 def clean_string(text):
     """
     Clean the punctuation and stopwords in the input string and turn the string to lower case.
@@ -51,10 +187,32 @@ def clean_string(text):
     text : str
         The cleaned string.
     """
-    text = ''.join([char for char in text if char not in string.punctuation])
-    text = text.lower()
-    text = ' '.join([word for word in text.split() if word not in stopwords])
-    return text
+    stop = get_stopwords()
+    return ' '.join([word for word in text.translate(punctuation_table).lower().split() if word not in stop])
+
+@instrumented
+def clean_strings(values):
+    """
+    Clean the punctuation and stopwords in a batch of strings and turn them to lower case, 
+    with the same result as clean_string on each string. Each distinct string is only cleaned once.
+
+    Parameters
+    ----------
+    values : Series or array_like
+        The input strings. Missing values stay missing.
+
+    Returns
+    -------
+     : Series or ndarray
+        The cleaned strings, a Series with the same index if the input is a Series.
+    """
+    codes, uniques = pd.factorize(values)
+    cleaned = np.array([clean_string(text) for text in uniques], dtype=object)
+    res = np.full(len(codes), np.nan, dtype=object)
+    res[codes!=-1] = cleaned.take(codes[codes!=-1])
+    if isinstance(values, pd.Series):
+        return pd.Series(res, index=values.index, name=values.name, dtype=object)
+    return res
 
 def cosine_sim_vectors(vec1, vec2):
     """
@@ -73,12 +231,93 @@ def cosine_sim_vectors(vec1, vec2):
      : float
         The cosine similarity score of the two given vectorized strings.
     """
+    from sklearn.metrics.pairwise import cosine_similarity
     vec1 = vec1.reshape(1,-1)
     vec2 = vec2.reshape(1,-1)
     return cosine_similarity(vec1, vec2)[0]
 
 
-def com_sim_cat(df, column, sim_threshold=0.4):
+def similar_pairs(vectors, sim_threshold, top_k=None, block_size=4096, max_candidates=2**20):
+    """
+    Find all the pairs of rows whose cosine similarity score is at least sim_threshold, 
+    without computing the full pairwise similarity matrix.
+
+    The features of each row are ordered from the rarest to the most common, and only the 
+    shortest prefix that leaves a remaining norm below sim_threshold is indexed. Two rows can
+    only reach sim_threshold if their prefixes share a feature, so rows that only share 
+    common words are never compared.
+
+    Parameters
+    ----------
+    vectors : sparse matrix
+        The row-normalized vectors, one row per string.
+    sim_threshold : float
+        The threshold of cosine similarity score, in range (0, 1].
+    top_k : int, default None
+        If provided, only keep the top_k most similar pairs of each row.
+    block_size : int, default 4096
+        The largest number of rows whose candidate pairs are generated at once.
+    max_candidates : int, default 2**20
+        The largest number of candidate pairs generated at once, to bound the memory.
+        A single row with more candidates is processed on its own.
+
+    Returns
+    -------
+    rows : ndarray
+        The first row index of each pair.
+    cols : ndarray
+        The second row index of each pair, larger than the first one.
+    sims : ndarray
+        The cosine similarity score of each pair.
+    """
+    from scipy import sparse
+    vectors = vectors.tocsr()
+    vectors.sort_indices()
+    row_of = np.repeat(np.arange(vectors.shape[0]), np.diff(vectors.indptr))
+    # rank the features from the rarest to the most common
+    rarity = np.argsort(np.argsort(np.bincount(vectors.indices, minlength=vectors.shape[1]), kind='stable'))
+    order = np.lexsort((rarity[vectors.indices], row_of))
+    weights = vectors.data[order]**2
+    # the norm of the entries from each entry to the end of its row
+    ends = np.cumsum(weights)[vectors.indptr[1:]-1][row_of] if len(weights) else weights
+    tails = ends - np.cumsum(weights) + weights
+    keep = tails>=sim_threshold**2*(1-1e-9)
+    prefix = sparse.csr_matrix((np.ones(keep.sum()), (row_of[keep], vectors.indices[order][keep])),
+                               shape=vectors.shape)
+    index = prefix.T.tocsr()
+    rows, cols, sims = [], [], []
+    # the number of candidates of each row is at most the total length of its posting lists,
+    # blocks end before max_candidates so that a few common features cannot exhaust the memory
+    bound = np.cumsum(prefix @ np.diff(index.indptr).astype(float))
+    start = 0
+    while start<vectors.shape[0]:
+        reached = bound[start-1] if start else 0
+        stop = min(start+block_size, max(start+1, int(np.searchsorted(bound, reached+max_candidates, side='right'))))
+        candidates = (prefix[start:stop] @ index).tocoo()
+        start, block = stop, start
+        first = candidates.row + block
+        pick = first<candidates.col
+        first, second = first[pick], candidates.col[pick]
+        sim = np.asarray(vectors[first].multiply(vectors[second]).sum(axis=1)).ravel()
+        pick = sim>=sim_threshold
+        rows.append(first[pick])
+        cols.append(second[pick])
+        sims.append(sim[pick])
+    rows, cols, sims = np.concatenate(rows), np.concatenate(cols), np.concatenate(sims)
+    if top_k is not None and len(rows):
+        # rank the pairs of each row by similarity score, for both rows of the pair
+        owners = np.concatenate([rows, cols])
+        order = np.lexsort((-np.concatenate([sims, sims]), owners))
+        starts = np.searchsorted(owners[order], owners[order])
+        rank = np.empty(len(order), dtype=int)
+        rank[order] = np.arange(len(order)) - starts
+        pick = (rank[:len(rows)]<top_k) | (rank[len(rows):]<top_k)
+        rows, cols, sims = rows[pick], cols[pick], sims[pick]
+    return rows, cols, sims
+
+@instrumented
+@cached(writes=('df', 'column'), reads=lambda args: [args['column']])
+def com_sim_cat(df, column, sim_threshold=0.4, mode='adjacent', top_k=None):
     """
     Given a categorical column in a DataFrame, calculate the pairwise cosine similarity score
     in the alphabetic-ordered series of categories. If the similarity score is higher than the sim_threshold, 
@@ -94,6 +333,18 @@ def com_sim_cat(df, column, sim_threshold=0.4):
     sim_threshold : float, default 0.4
         The threshold of cosines similarity score. If a pair has score higher than the threshold, do the replacement.
         The score range is [0, 1].
+    mode : str, default 'adjacent'
+        Decides which pairs of categories are compared. The set of possible mode is:
+        'adjacent' : compare each category with the next one in alphabetic order.
+        'cluster' : find all the pairs of categories above sim_threshold with similar_pairs, 
+        group the connected pairs into clusters, and replace every category in a cluster 
+        by the shortest category name of the cluster. The categories are compared on their
+        character trigrams, weighted by inverse document frequency, so spelling variants match
+        and trigrams shared by many categories count less.
+    top_k : int, default None
+        For 'cluster' mode, if provided, only the top_k most similar categories of each category
+        are linked. This bounds the number of pairs, but the clusters then depend on top_k,
+        since a dropped pair may have been the only link between two parts of a cluster.
 
     Returns
     -------
@@ -102,29 +353,172 @@ def com_sim_cat(df, column, sim_threshold=0.4):
     repl_dict : dict
         The dictionary the contains the keys that are replaced by the corresponding values.
     """
-    # clean the target column
-    df[column] = df[column].apply(clean_string)
+    from scipy import sparse
+    from scipy.sparse.csgraph import connected_components
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+    from sklearn.preprocessing import normalize
+    # clean the distinct categories only and map them back to the rows by codes
+    with stage('clean', len(df)):
+        codes, uniques = pd.factorize(df[column])
+        cleaned = clean_strings(np.asarray(uniques, dtype=object))
+        df[column] = pd.Series(cleaned.take(codes), index=df.index, dtype=object).where(codes!=-1)
     # initialize the dict to store the value to replace
     repl_dict = {}
     # get the target column categories as list
-    phrases = list(df[column].value_counts().sort_index().index)
-    # vectorize the target column categories
-    vectorizer = CountVectorizer().fit_transform(phrases)
-    vectors = vectorizer.toarray()
-    for i in range(0, len(vectors)-1):
-        sim = cosine_sim_vectors(vectors[i], vectors[i+1])
-        if sim >= sim_threshold:
-            if (len(phrases[i])<=len(phrases[i+1])):
-                repl_dict[phrases[i+1]] = phrases[i]
-                phrases[i+1] = phrases[i]
-            else:
-                repl_dict[phrases[i]] = phrases[i+1]
-                phrases[i] = phrases[i+1]
-        else: 
-            continue
-    return df[column].replace(repl_dict), repl_dict
-
-def comp_key(df, column1, column2, key_name, concat_sign=':'):
+    phrases = sorted(set(cleaned))
+    # vectorize the target column categories, keep the vectors sparse
+    with stage('vectorize', len(phrases)):
+        if mode=='cluster':
+            # character trigrams within words match spelling variants like 'corp' and 'corporation'
+            counts = CountVectorizer(analyzer='char_wb', ngram_range=(3, 3)).fit_transform(phrases)
+        else:
+            counts = CountVectorizer().fit_transform(phrases)
+    with stage('similarity', len(phrases)):
+        if mode=='adjacent':
+            vectors = normalize(counts)
+            # cosine similarity of every adjacent pair as one batched row-wise dot product
+            sims = np.asarray(vectors[:-1].multiply(vectors[1:]).sum(axis=1)).ravel()
+            for i in np.flatnonzero(sims>=sim_threshold):
+                if (len(phrases[i])<=len(phrases[i+1])):
+                    repl_dict[phrases[i+1]] = phrases[i]
+                    phrases[i+1] = phrases[i]
+                else: 
+                    repl_dict[phrases[i]] = phrases[i+1]
+                    phrases[i] = phrases[i+1]
+        elif mode=='cluster':
+            # words shared by many categories, like 'inc', weigh less
+            vectors = TfidfTransformer().fit_transform(counts)
+            rows, cols, _ = similar_pairs(vectors, sim_threshold, top_k)
+            graph = sparse.coo_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(phrases), len(phrases)))
+            _, labels = connected_components(graph, directed=False)
+            # the shortest, then alphabetically first, category name represents its cluster
+            lengths = np.array([len(phrase) for phrase in phrases])
+            order = np.lexsort((np.arange(len(phrases)), lengths, labels))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = labels[order][1:]!=labels[order][:-1]
+            representative = np.empty(len(labels), dtype=int)
+            representative[labels[order][first]] = order[first]
+            for i in np.flatnonzero(representative[labels]!=np.arange(len(phrases))):
+                repl_dict[phrases[i]] = phrases[representative[labels[i]]]
+        else:
+            raise ValueError("Wrong Parameter")
+    # replace on the distinct categories, then map them back to the rows
+    merged = np.array([repl_dict.get(category, category) for category in cleaned], dtype=object)
+    return pd.Series(merged.take(codes), index=df.index, name=df[column].name, dtype=object).where(codes!=-1), repl_dict
+
+class KeyEncoding:
+    """
+    The lossless mapping between the value combinations of key columns and 64-bit integer keys.
+    Each column is factorized, and the codes of a row are combined like the digits of a
+    mixed-radix number, the first column being the most significant. Missing values get a
+    code like any other value.
+
+    Parameters
+    ----------
+    columns : list
+        The key column names.
+    uniques : list
+        The Index of the distinct values of each key column, in code order.
+    """
+    def __init__(self, columns, uniques):
+        self.columns = list(columns)
+        self.uniques = list(uniques)
+        self.sizes = [max(len(values), 1) for values in self.uniques]
+        combinations = math.prod(self.sizes)
+        if combinations>np.iinfo('int64').max:
+            raise ValueError(f"The key columns have {combinations} value combinations, "
+                             f"more than a 64-bit key can hold, please use mode 'hash'")
+
+    def combine(self, codes):
+        """
+        Combine the codes of the key columns into integer keys.
+
+        Parameters
+        ----------
+        codes : list
+            The int64 code array of each key column, -1 for a value without a code.
+
+        Returns
+        -------
+         : ndarray
+            The int64 keys, -1 for the rows with a value without a code.
+        """
+        keys = np.zeros(len(codes[0]), dtype='int64')
+        unknown = np.zeros(len(keys), dtype=bool)
+        for code, size in zip(codes, self.sizes):
+            keys *= size
+            keys += code
+            unknown |= code<0
+        keys[unknown] = -1
+        return keys
+
+    def encode(self, df):
+        """
+        Get the integer keys of the rows of a DataFrame with the same key columns, e.g. the other
+        side of a join, so both sides are keyed by the same encoding.
+
+        Parameters
+        ----------
+        df : DataFrame
+            The DataFrame that contains the key columns.
+
+        Returns
+        -------
+         : Series
+            The int64 keys, -1 for the rows with a value combination this encoding has not seen.
+        """
+        codes = [values.get_indexer(df[column]).astype('int64') for column, values in zip(self.columns, self.uniques)]
+        return pd.Series(self.combine(codes), index=df.index, dtype='int64')
+
+    def decode(self, keys):
+        """
+        Get back the values of the key columns from integer keys.
+
+        Parameters
+        ----------
+        keys : Series or array-like
+            The integer keys.
+
+        Returns
+        -------
+         : DataFrame
+            The DataFrame with the key columns, missing values for the keys -1.
+        """
+        index = keys.index if isinstance(keys, pd.Series) else None
+        rest = np.asarray(keys, dtype='int64')
+        unknown = rest<0
+        rest = np.where(unknown, 0, rest)
+        res = {}
+        for column, values, size in reversed(list(zip(self.columns, self.uniques, self.sizes))):
+            rest, code = np.divmod(rest, size)
+            res[column] = pd.Series(values.take(code), index=index).where(~unknown)
+        return pd.DataFrame({column: res[column] for column in self.columns})
+
+def key_encoding(df, columns):
+    """
+    Factorize the key columns of a DataFrame once. Please refer to KeyEncoding.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The DataFrame that contains the key columns.
+    columns : list
+        The key column names.
+
+    Returns
+    -------
+     : tuple
+        The int64 code arrays of the key columns and their KeyEncoding.
+    """
+    codes, uniques = [], []
+    for column in columns:
+        code, values = pd.factorize(df[column], use_na_sentinel=False)
+        codes.append(code.astype('int64'))
+        uniques.append(pd.Index(values))
+    return codes, KeyEncoding(columns, uniques)
+
+@instrumented
+def comp_key(df, column1, column2, key_name, concat_sign=':', mode='string', return_encoding=False):
     """    
     Create a new column in the given DataFrame that contains concatenation of two given columns as composite key.
 
@@ -134,17 +528,46 @@ def comp_key(df, column1, column2, key_name, concat_sign=':'):
         The DataFrame contains column1 and column2 and in which a new column of composite keys would be created.
     column1: str
         The column name of the first column to be concatenated.
-    column2: str
-        The column name of the second column to be concatenated.    
+    column2: str or list
+        The column name of the second column to be concatenated, or the list of the column names
+        that follow the first column for a key of more than two columns.
     key_name: str
         The name of the new composite key column.
     concat_sign: str, default ':
         The sign to concat the filed of the first column and the field of the second column.
+        Only used by the 'string' mode.
+    mode: str, default 'string'
+        How the key is built. The set of possible modes is:
+        'string' : concatenation of the string columns with concat_sign.
+        'integer' : the columns are factorized and their codes are combined into one int64 key,
+                    which can be decoded back to the column values with the KeyEncoding given by
+                    return_encoding. Works on columns of any dtype, missing values included.
+        'hash' : a 64-bit hash of the values of each row, stored as int64, for columns with too many
+                 value combinations for the 'integer' mode. Equal rows get equal keys in any DataFrame,
+                 and two different rows of n rows share a key with a probability of about n**2/2**65.
+    return_encoding: bool, default False
+        Whether to also return the KeyEncoding of the 'integer' mode. Please refer to KeyEncoding.
 
     Returns
     -------
-     : Series
-        The column of the composite keys.
+     : Series or tuple
+        The column of the composite keys. If return_encoding is True, the tuple of the column and
+        the KeyEncoding to decode it, None for the 'string' and 'hash' modes.
     """
-    df[key_name] = df[column1] + concat_sign + df[column2]
-    return df[key_name]
\ No newline at end of file
+    columns = [column1] + (list(column2) if pd.api.types.is_list_like(column2) else [column2])
+    if mode=='string':
+        key = df[columns[0]]
+        for column in columns[1:]:
+            key = key + concat_sign + df[column]
+        df[key_name] = key
+        encoding = None
+    elif mode=='integer':
+        codes, encoding = key_encoding(df, columns)
+        df[key_name] = pd.Series(encoding.combine(codes), index=df.index, dtype='int64')
+    elif mode=='hash':
+        hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+        df[key_name] = pd.Series(hashes.view('int64'), index=df.index)
+        encoding = None
+    else:
+        raise ValueError("Wrong Parameter")
+    return (df[key_name], encoding) if return_encoding else df[key_name]
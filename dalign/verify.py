@@ -1,9 +1,34 @@
 import numpy as np
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+from . import parallel, render
+from .outlier import column_bounds, deviations
+from .profile import profile, category_stats, column_moments, numeric_columns
+from .utility import is_categorical
+from .sketch import SpaceSaving, approx_distinct, heavy_hitters
+from .instrument import instrumented
+from .cache import cached
 
-def num_var_info(df):
+def describe_columns(df):
+    """
+    Get the columns DataFrame.describe reports on: the numerical and the datetime columns.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The input DataFrame.
+
+    Returns
+    -------
+     : list
+        The column names.
+    """
+    numeric = set(numeric_columns(df))
+    return [column for column in df.columns
+            if column in numeric or pd.api.types.is_datetime64_any_dtype(df[column].dtype)]
+
+@instrumented
+@cached(ignore=('n_jobs',), reads=lambda args: describe_columns(args['df']))
+def num_var_info(df, prof=None, n_jobs=None):
     """    
     Show statistics for all the numerical columns in the DataFrame.
 
@@ -12,17 +37,28 @@ def num_var_info(df):
     df : DataFrame
         The DataFrame contains numerical columns to show statistics. The statistics are: 
         count, mean, std, min, 25%, 50%, 75%, max, and range.
+    prof : Profile or StreamProfile, default None
+        The result of profile.profile(df) or the StreamProfile of df. If provided, the statistics are read from it 
+        instead of scanning the DataFrame again.
+    n_jobs : int, default None
+        The number of worker processes to profile the columns with. 
+        Please refer to parallel.resolve_jobs.
 
     Returns
     -------
     res : DataFrame
         The DataFrame with the numerical column name as title, and statistics as index.
     """
+    if prof is None and n_jobs is not None:
+        prof = profile(df, n_jobs)
+    if prof is not None:
+        return prof.num_var_info()
     res = df.describe()
     res.loc['range'] = res.loc['max',:]-res.loc['min',:]
     return res
 
-def num_var_dist(df, mode='subplot'):
+@instrumented
+def num_var_dist(df, mode='subplot', max_points=100000, path=None, n_jobs=None):
     """    
     Plot the value distributions of all numeric columns in the given DataFrame. 
     The plots can be shown one by one or as subplots of a figure.
@@ -35,26 +71,48 @@ def num_var_dist(df, mode='subplot'):
         The mode that decides how these plots are shown. The set of possible mode is:
         'subplot' : show all the plots as subplots of a figure.
         'plot' : show all the plots one by one.
+        'report' : write the plots of the numerical columns headlessly to the path directory.
+    max_points : int, default 100000
+        Columns longer than max_points are drawn from precomputed histograms.
+        Please refer to render.histplot.
+    path : str, default None
+        The output directory of the 'report' mode, required in that mode.
+    n_jobs : int, default None
+        The number of worker processes that draw the plots in the 'report' mode.
+        Please refer to report.batch_report.
+
+    Returns
+    -------
+     : tuple
+        Only in the 'report' mode, the DataFrame of figures with their paths and timings
+        and the path of the HTML bundle. Please refer to report.write_report.
     """
+    if mode=='report':
+        if path is None:
+            raise ValueError("The 'report' mode requires a path")
+        from .report import write_report
+        return write_report(df, path, kinds=("num",), n_jobs=n_jobs)
+    import matplotlib.pyplot as plt
     counter = 1
     if (mode=='subplot'):
         plt.figure(figsize=(10,10))
-        fig_num = int(np.ceil(np.sqrt(len([column for column in df.columns if df[column].dtype!=object]))))
+        fig_num = int(np.ceil(np.sqrt(len([column for column in df.columns if not is_categorical(df[column].dtype)]))))
         for column in df.columns:
             plt.subplot(fig_num, fig_num, counter)
-            if (df[column].dtype!=object):
-                sns.histplot(df[column])
+            if (not is_categorical(df[column].dtype)):
+                render.histplot(df[column], max_points)
                 counter += 1
     elif (mode=='plot'):
         for column in df.columns:
-            if (df[column].dtype!=object):
+            if (not is_categorical(df[column].dtype)):
                 plt.figure(counter)
-                sns.histplot(df[column])
+                render.histplot(df[column], max_points)
                 counter += 1
     else:
         raise ValueError("Wrong Parameter")
 
-def show_outlier(df, column, deviation=2):
+@instrumented
+def show_outlier(df, column, deviation=None, prof=None, n_jobs=None, method='zscore'):
     """    
     For a given numerical column in a DataFrame, show statistics of this column, 
     number of outliers and all the indexes and values of the outliers 
@@ -66,20 +124,48 @@ def show_outlier(df, column, deviation=2):
         The DataFrame that contains the target numeric column.
     column : str
         The name of target numeric column.
-    deviation : float
+    deviation : float, default None
         The threshold of deviation that determines whether a value is outlier or not.
+        The default of the method if None: 2 for 'zscore', 1.5 for 'iqr' and 3 for 'mad'.
+    prof : Profile, default None
+        The result of profile.profile(df). If provided, the statistics are read from it.
+    n_jobs : int, default None
+        The number of worker processes to compute the statistics with, each worker takes 
+        a range of rows. Please refer to parallel.resolve_jobs.
+    method : str, default 'zscore'
+        The outlier rule, 'zscore' for the deviation from the mean in standard deviations, 
+        'iqr' or 'mad'. Please refer to outlier.column_bounds.
 
     Returns
     -------
      : Series
         The Series with the outliers' indexes as index and outliers' values as value.
+        Please refer to outlier.find_outliers for the outliers of many columns as row positions.
     """
-    print(f'Column name: {column}\n\tMax: {df[column].max()}\n\tMin: {df[column].min()}\n\tRange:{df[column].max()-df[column].min()}\n\tMean:{df[column].mean()}', end='\n\n')
-    print(f'Number of Outliers: {len(df[column][abs(df[column] - np.mean(df[column]))>deviation*np.std(df[column])])}')
+    if prof is not None:
+        high, low, mean, std = prof.stats.loc[['max', 'min', 'mean', 'pop_std'], column]
+    elif n_jobs is not None:
+        moments = column_moments(df, column, n_jobs)
+        high, low, mean, std = moments.max, moments.min, moments.mean, moments.std(ddof=0)
+    else:
+        high, low, mean, std = df[column].max(), df[column].min(), df[column].mean(), df[column].std(ddof=0)
+    values = df[column].to_numpy(dtype=float, na_value=np.nan)
+    if method=='zscore':
+        deviation = deviations['zscore'] if deviation is None else deviation
+        positions = np.flatnonzero(np.abs(values-mean)>deviation*std)
+    else:
+        low_bound, high_bound = column_bounds(values, method, deviation)
+        positions = np.flatnonzero((values<low_bound) | (values>high_bound))
+    outliers = df[column].iloc[positions]
+    print(f'Column name: {column}\n\tMax: {high}\n\tMin: {low}\n\tRange:{high-low}\n\tMean:{mean}', end='\n\n')
+    print(f'Number of Outliers: {len(outliers)}')
     print(f'Index\tValue', end='')
-    return df[column][abs(df[column] - np.mean(df[column]))>deviation*np.std(df[column])]
+    return outliers
 
-def cat_var_type_counts(df):
+@instrumented
+@cached(ignore=('n_jobs',), reads=lambda args: [column for column in args['df'].columns
+                                                if is_categorical(args['df'][column].dtype)])
+def cat_var_type_counts(df, prof=None, n_jobs=None, approx=False, error=0.01):
     """
     Given a DataFrame, for all the categorical columns, show how many categories are in each column.
 
@@ -87,21 +173,67 @@ def cat_var_type_counts(df):
     ----------
     df : DataFrame
         The DataFrame that contains categorical columns.
+    prof : Profile or StreamProfile, default None
+        The result of profile.profile(df) or the StreamProfile of df. If provided, the counts are read from it.
+    n_jobs : int, default None
+        The number of worker processes to count the categories with, the categorical columns
+        are sent to the workers one by one. Please refer to parallel.resolve_jobs.
+    approx : bool, default False
+        Whether to estimate the counts with HyperLogLog in constant memory instead of 
+        building the set of categories of each column. Please refer to sketch.approx_distinct.
+    error : float, default 0.01
+        The relative standard error of the estimated counts when approx is True.
     
     Returns
     -------
      : DataFrame
         The DataFrame contains the categorical column names and the number of category types in each column.
     """
-    col_num = len([column for column in df.columns if df[column].dtype==object])
-    report = []
-    counter = 0
-    for column in df.columns:
-        if (df[column].dtype==object):
-            report.append([column, len(df[column].unique())])
-    return pd.DataFrame(report, columns=['column_name', 'number_of_category_type'])
+    if approx:
+        return pd.DataFrame([[column, approx_distinct(df[column], error)] for column in df.columns
+                             if is_categorical(df[column].dtype)], columns=['column_name', 'number_of_category_type'])
+    if prof is not None:
+        return prof.cat_var_type_counts()
+    categorical = [column for column in df.columns if is_categorical(df[column].dtype)]
+    if parallel.resolve_jobs(n_jobs)>1 and categorical:
+        counts = [types for _, types in parallel.map_columns(category_stats, df, categorical, n_jobs)]
+    else:
+        counts = [len(df[column].unique()) for column in categorical]
+    return pd.DataFrame(list(zip(categorical, counts)), columns=['column_name', 'number_of_category_type'])
 
-def cat_var_vis(df, mode='subplot', max_category_num=10, label_distance=1.5):
+def pie_counts(series, max_category_num, approx=False):
+    """
+    Get the category counts of a column to plot as a pie chart, if it has less than max_category_num
+    category types, counting missing values as one type.
+
+    Parameters
+    ----------
+    series : Series
+        The categorical column.
+    max_category_num : int
+        Please refer to cat_var_vis.
+    approx : bool, default False
+        Whether to count with a SpaceSaving summary of max_category_num categories, which uses
+        constant memory and gives the exact counts of the columns that are plotted.
+
+    Returns
+    -------
+     : Series
+        The value counts of the column, None if it has too many category types.
+    """
+    if approx:
+        summary = SpaceSaving(max_category_num).update(series)
+        if not summary.exact() or len(summary.counts)+(summary.nulls>0)>=max_category_num:
+            return None
+        counts = summary.top()
+        counts.name, counts.index.name = 'count', series.name
+        return counts
+    if len(series.unique())>=max_category_num:
+        return None
+    return series.value_counts()
+
+@instrumented
+def cat_var_vis(df, mode='subplot', max_category_num=10, label_distance=1.5, path=None, n_jobs=None, approx=False):
     """
     Plot the pie charts for categorical columns in the DataFrame to show the percentage of each category.
 
@@ -109,35 +241,152 @@ def cat_var_vis(df, mode='subplot', max_category_num=10, label_distance=1.5):
     ----------
     df : DataFrame
         The pandas DataFrame that contains categorical columns to plot pie chart.
+    mode : string
+        The mode that decides how these plots are shown. The set of possible mode is:
+        'subplot' : show all the plots as subplots of a figure.
+        'plot' : show all the plots one by one.
+        'report' : write the plots headlessly to the path directory.
     max_category_num : int
         The maximum number of categories a column have for the column to be plot.
         This parameter is to avoid to plot the column contains all different strings instead of categories.
     label_distance : float
         The distance between category labels.
+    path : str, default None
+        The output directory of the 'report' mode, required in that mode.
+    n_jobs : int, default None
+        The number of worker processes that draw the plots in the 'report' mode.
+        Please refer to report.batch_report.
+    approx : bool, default False
+        Whether to count the categories in constant memory. Please refer to pie_counts.
+
+    Returns
+    -------
+     : tuple
+        Only in the 'report' mode, the DataFrame of figures with their paths and timings
+        and the path of the HTML bundle. Please refer to report.write_report.
     """
+    if mode=='report':
+        if path is None:
+            raise ValueError("The 'report' mode requires a path")
+        from .report import write_report
+        return write_report(df, path, kinds=("cat",), n_jobs=n_jobs, max_category_num=max_category_num,
+                            label_distance=label_distance)
+    import matplotlib.pyplot as plt
     counter = 1
+    if mode not in ("subplot", "plot"):
+        raise ValueError("Wrong Parameter")
+    # count each column once, the pie charts are drawn from the counts
+    pies = {}
+    for column in df.columns:
+        if (is_categorical(df[column].dtype)):
+            counts = pie_counts(df[column], max_category_num, approx)
+            if counts is not None:
+                pies[column] = counts
     if mode=="subplot":
         plt.figure(figsize=(15,15))
-        fig_num = int(np.ceil(np.sqrt(len([column for column in df.columns if df[column].dtype==object and len(df[column].unique()) < max_category_num]))))
-        for column in df.columns:
-            if (df[column].dtype==object) and len(df[column].unique()) < max_category_num:
-                plt.subplot(fig_num, fig_num, counter)
-                plt.pie(df[column].value_counts(), labels=df[column].value_counts().index, labeldistance=label_distance)
-                plt.legend(bbox_to_anchor=(0.2,0.2))
-                plt.title(column)
-                counter+=1
+        fig_num = int(np.ceil(np.sqrt(len(pies))))
+        for column, counts in pies.items():
+            plt.subplot(fig_num, fig_num, counter)
+            plt.pie(counts, labels=counts.index, labeldistance=label_distance)
+            plt.legend(bbox_to_anchor=(0.2,0.2))
+            plt.title(column)
+            counter+=1
     elif mode=="plot":
-        for column in df.columns:
-            if (df[column].dtype==object) and len(df[column].unique()) < max_category_num:
-                plt.figure(counter)
-                plt.pie(df[column].value_counts(), labels=df[column].value_counts().index, labeldistance=label_distance)
-                plt.legend(bbox_to_anchor=(0.2,0.2))
-                plt.title(column)
-                counter+=1
-    else:
+        for column, counts in pies.items():
+            plt.figure(counter)
+            plt.pie(counts, labels=counts.index, labeldistance=label_distance)
+            plt.legend(bbox_to_anchor=(0.2,0.2))
+            plt.title(column)
+            counter+=1
+
+class CatEncoding:
+    """
+    The category counts of a categorical column, counted once and reused by cat_counts_sort
+    for every page of a ranking. The order of the categories is only computed as far as a
+    page needs it, and the alphabetic order of the categories is sorted once and cached.
+
+    Parameters
+    ----------
+    counts : Series
+        The category counts in the order the categories first appear, as given by
+        Series.value_counts(sort=False).
+    """
+    def __init__(self, counts):
+        self.counts = counts
+        self.values = counts.to_numpy(dtype='int64')
+        self.alphabetic = None
+
+    def order(self, orderby="frequency", ascending=True, stop=None):
+        """
+        Get the positions of the first categories in the given order.
+
+        Parameters
+        ----------
+        orderby : str, default 'frequency'
+            Please refer to cat_counts_sort. Equal counts are ordered by first appearance.
+        ascending : bool, default True
+            Please refer to cat_counts_sort.
+        stop : int, default None
+            The number of leading positions needed, all of them if None.
+
+        Returns
+        -------
+         : ndarray
+            The positions of the categories in counts.
+        """
+        size = len(self.values)
+        stop = size if stop is None else min(stop, size)
+        if orderby=="frequency":
+            # one key orders by count, then by first appearance
+            key = (self.values if ascending else -self.values)*size + np.arange(size)
+            if stop<size:
+                part = np.argpartition(key, stop-1)[:stop] if stop>0 else np.empty(0, dtype='int64')
+                return part[np.argsort(key[part])]
+            return np.argsort(key)
+        elif orderby=="alphabetic":
+            if self.alphabetic is None:
+                self.alphabetic = self.counts.index.argsort()
+            return self.alphabetic[:stop] if ascending else self.alphabetic[::-1][:stop]
         raise ValueError("Wrong Parameter")
 
-def cat_counts_sort(df, column, row_index_start=0, row_index_end=10, orderby="frequency", ascending=True):
+    def page(self, row_index_start=0, row_index_end=10, orderby="frequency", ascending=True):
+        """
+        Get the category counts in the given order and index range. Please refer to cat_counts_sort.
+
+        Returns
+        -------
+         : Series
+            The Series with categories as index and category counts as values in the given index range.
+        """
+        partial = (isinstance(row_index_end, (int, np.integer)) and row_index_end>=0
+                   and (row_index_start is None or row_index_start>=0))
+        positions = self.order(orderby, ascending, row_index_end if partial else None)
+        return self.counts.iloc[positions[row_index_start:row_index_end]]
+
+@instrumented
+def cat_encoding(df, column):
+    """
+    Count the categories of a categorical column once, so cat_counts_sort can page through
+    its ranking without counting and sorting the whole column again.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The DataFrame that contains the target categorical column.
+    column : str
+        The name of target categorical column.
+
+    Returns
+    -------
+     : CatEncoding
+        The category counts of the column.
+    """
+    counts = df[column].value_counts(sort=False)
+    return CatEncoding(counts)
+
+@instrumented
+def cat_counts_sort(df, column, row_index_start=0, row_index_end=10, orderby="frequency", ascending=True, prof=None,
+                    approx=False, error=0.001, encoding=None):
     """
     For a given categorical column in DataFrame, show its value counts 
     in frequency order or alphabetic order in the given index range.
@@ -158,6 +407,18 @@ def cat_counts_sort(df, column, row_index_start=0, row_index_end=10, orderby="fr
         'alphabetic' : show all the plots one by one.
     ascending : bool, default True
         Decides whether the value counts Series is in ascending order or descending order.
+    prof : StreamProfile, default None
+        The profile of the DataFrame. If provided, the value counts are read from it 
+        instead of scanning the column again, and df can be None.
+    approx : bool, default False
+        Whether to count the most frequent categories with a SpaceSaving summary in constant memory.
+        The counts are upper bounds, and only 'frequency' order with ascending=False is supported.
+        Please refer to sketch.heavy_hitters.
+    error : float, default 0.001
+        The largest count error as a fraction of the column length when approx is True.
+    encoding : CatEncoding, default None
+        The result of cat_encoding(df, column). If provided, the categories are not counted again,
+        which makes paging through the ranking of a long column cheap.
     
     Returns
     -------
@@ -165,11 +426,22 @@ def cat_counts_sort(df, column, row_index_start=0, row_index_end=10, orderby="fr
         The Series with categories as index and category counts as values in the given index range
         sorted by the given order.
     """
+    if approx:
+        if orderby!="frequency" or ascending:
+            raise ValueError("Wrong Parameter")
+        counts = heavy_hitters(df[column], error, row_index_end).top()
+        counts.name, counts.index.name = 'count', column
+    elif prof is not None:
+        counts = prof.value_counts(column)
     if (orderby=="frequency"):
         print("Sort By Frequency Order: ")
-        return df[column].value_counts().sort_values(ascending=ascending)[row_index_start:row_index_end]
     elif (orderby=="alphabetic"):
         print("Sort By Alphabetic Order: ")
-        return df[column].value_counts().sort_index(ascending=ascending)[row_index_start:row_index_end]
     else:
-        raise ValueError("Wrong Parameter")
\ No newline at end of file
+        raise ValueError("Wrong Parameter")
+    if approx or prof is not None:
+        encoding = CatEncoding(counts)
+    elif encoding is None:
+        encoding = cat_encoding(df, column)
+    # only the categories up to row_index_end are put in order
+    return encoding.page(row_index_start, row_index_end, orderby, ascending)
\ No newline at end of file
@@ -19,6 +19,7 @@ INSTALL_REQUIRES = [
       'pandas',
       'matplotlib',
       'seaborn',
+      'scipy',
       'sklearn',
       'nltk'
 ]
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from dalign import cache, missing, verify
+
+def make_frame(rows=1000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({f'x{i}': rng.normal(size=rows) for i in range(8)})
+    for i in range(4):
+        df[f's{i}'] = rng.choice([f'v{j}' for j in range(1000)], rows).astype(object)
+    df.loc[::7, 's1'] = None
+    return df
+
+def fail(*args, **kwargs):
+    raise AssertionError("computed again on a cache hit")
+
+def test_hit_returns_the_result_without_calling_again(monkeypatch):
+    df = make_frame()
+    cases = [(verify.cat_var_type_counts, pd.Series, 'unique'),
+             (missing.missing_val_info, pd.DataFrame, 'isnull'),
+             (verify.num_var_info, pd.DataFrame, 'describe')]
+    cache.enable()
+    cache.clear()
+    try:
+        for func, owner, name in cases:
+            expected = func(df)
+            with monkeypatch.context() as patch:
+                # the work of each function fails if it runs again
+                patch.setattr(owner, name, fail)
+                res = func(df)
+            assert res.equals(expected)
+        assert cache.stats==dict(hits=3, misses=3)
+    finally:
+        cache.disable()
+        cache.clear()
+
+def test_wrapped_function_runs_once_per_key():
+    calls = []
+    @cache.cached(ignore=('n_jobs',))
+    def total(df, column, n_jobs=None):
+        calls.append(column)
+        return df[column].sum()
+    df = make_frame()
+    cache.enable()
+    cache.clear()
+    try:
+        assert total(df, 'x0')==total(df, 'x0', n_jobs=2)==df['x0'].sum()
+        total(df, 'x1')
+        assert calls==['x0', 'x1']
+        assert cache.stats==dict(hits=1, misses=2)
+    finally:
+        cache.disable()
+        cache.clear()
+
+def test_changed_column_invalidates_only_its_readers():
+    df = make_frame()
+    cache.enable()
+    cache.clear()
+    try:
+        verify.cat_var_type_counts(df)
+        df.loc[3, 'x0'] = 100.0
+        verify.cat_var_type_counts(df)
+        assert cache.stats==dict(hits=1, misses=1)
+        df.loc[3, 's0'] = 'changed'
+        res = verify.cat_var_type_counts(df)
+        assert cache.stats==dict(hits=1, misses=2)
+        assert res.loc[res['column_name']=='s0', 'number_of_category_type'].item()==df['s0'].nunique()
+    finally:
+        cache.disable()
+        cache.clear()
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dalign.missing import Imputer
+
+def make_frame(rows=600, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'key': rng.choice(['a', 'b', 'c'], rows),
+                       'time': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.sort(rng.uniform(0, 1e6, rows)), unit='s'),
+                       'x': rng.normal(size=rows),
+                       'y': rng.choice([1.0, 2.0, 3.0], rows, p=[0.6, 0.3, 0.1])})
+    for column in ('x', 'y'):
+        # gaps of several consecutive rows, some at the start and the end of the groups
+        df.loc[rng.random(rows)<0.3, column] = np.nan
+        df.loc[:5, column] = np.nan
+        df.loc[rows-5:, column] = np.nan
+    return df
+
+def expected_fill(df, method):
+    groups = df.groupby('key')[['x', 'y']]
+    if method in ('mean', 'median'):
+        return df[['x', 'y']].fillna(groups.transform(method))
+    if method=='mood':
+        return df[['x', 'y']].fillna(groups.transform(lambda series: series.mode().iloc[0]))
+    if method=='forward':
+        return groups.ffill()
+    if method=='backward':
+        return groups.bfill()
+    if method=='linear':
+        return groups.transform(lambda series: series.interpolate(limit_area='inside'))
+    parts = []
+    for _, group in df.groupby('key'):
+        ordered = group.set_index('time')[['x', 'y']].interpolate(method='time', limit_area='inside')
+        parts.append(ordered.set_axis(group.index))
+    return pd.concat(parts).loc[df.index]
+
+@pytest.mark.parametrize('method', ['mean', 'median', 'mood', 'forward', 'backward', 'linear', 'time'])
+def test_each_method_by_group_matches_pandas(method):
+    df = make_frame()
+    res = Imputer(['x', 'y'], method, time_col='time' if method=='time' else None, by='key').fit_transform(df)
+    pd.testing.assert_frame_equal(res[['x', 'y']], expected_fill(df, method))
+    pd.testing.assert_frame_equal(res.drop(columns=['x', 'y']), df.drop(columns=['x', 'y']))
+
+def test_time_order_within_groups():
+    df = make_frame().sample(frac=1, random_state=0)
+    res = Imputer(['x', 'y'], 'forward', time_col='time', by='key').fit_transform(df)
+    ordered = df.sort_values('time', kind='stable')
+    expected = ordered.groupby('key')[['x', 'y']].ffill().loc[df.index]
+    pd.testing.assert_frame_equal(res[['x', 'y']], expected)
+
+@pytest.mark.parametrize('method, expected', [
+    ('forward', [np.nan, 1, 1, 4, np.nan, np.nan, np.nan, 8, 8]),
+    ('backward', [1, 1, 4, 4, np.nan, np.nan, np.nan, 8, np.nan]),
+    ('linear', [np.nan, 1, 2.5, 4, np.nan, np.nan, np.nan, 8, np.nan]),
+])
+def test_limit_leaves_longer_gaps_unfilled(method, expected):
+    df = pd.DataFrame({'x': [np.nan, 1, np.nan, 4, np.nan, np.nan, np.nan, 8, np.nan]})
+    res = Imputer(['x'], method, limit=1).fit_transform(df)
+    np.testing.assert_array_equal(res['x'].to_numpy(), np.array(expected, dtype=float))
+    # a gap as long as the limit is filled as a whole
+    assert Imputer(['x'], method, limit=3).fit_transform(df)['x'].iloc[4:7].notna().all()
+
+def test_limit_counts_the_gap_within_each_group():
+    df = pd.DataFrame({'key': ['a', 'b', 'a', 'b', 'a', 'b', 'a'],
+                       'x': [1, 5, np.nan, np.nan, np.nan, 6, 2]})
+    res = Imputer(['x'], 'forward', by='key', limit=1).fit_transform(df)
+    # the gap of 'a' is two rows long, the gap of 'b' one row
+    np.testing.assert_array_equal(res['x'].to_numpy(), [1, 5, np.nan, 5, np.nan, 6, 2])
+
+def unfilled_at_batch_end(df, batches, column):
+    """
+    Get the rows of the gaps that are still open at the end of their batch and group.
+    """
+    open_rows = np.zeros(len(df), dtype=bool)
+    for batch in batches:
+        for _, group in df.loc[batch].groupby('key'):
+            values = group[column].to_numpy()
+            seen = np.flatnonzero(~np.isnan(values))
+            tail = group.index[seen[-1]+1:] if len(seen) else group.index
+            open_rows[df.index.get_indexer(tail)] = True
+    return open_rows
+
+@pytest.mark.parametrize('method', ['mean', 'forward', 'backward', 'linear', 'time'])
+def test_stream_batches_match_one_transform(method):
+    df = make_frame()
+    time_col = 'time' if method=='time' else None
+    expected = Imputer(['x', 'y'], method, time_col=time_col, by='key').fit_transform(df)
+    imputer = Imputer(['x', 'y'], method, time_col=time_col, by='key', stream=True).fit(df)
+    batches = [df.index[start:start+97] for start in range(0, len(df), 97)]
+    res = pd.concat([imputer.transform(df.loc[batch]) for batch in batches])
+    for column in ('x', 'y'):
+        if method in ('backward', 'linear', 'time'):
+            # a gap at the end of a batch is only closed by a value of a later batch
+            late = unfilled_at_batch_end(df, batches, column)
+            assert res[column][late].isna().all()
+            pd.testing.assert_series_equal(res[column][~late], expected[column][~late])
+        else:
+            pd.testing.assert_series_equal(res[column], expected[column])
+
+def test_reset_starts_a_new_stream():
+    df = pd.DataFrame({'x': [1.0, np.nan]})
+    imputer = Imputer(['x'], 'forward', stream=True).fit(df)
+    imputer.transform(df)
+    assert imputer.transform(pd.DataFrame({'x': [np.nan]}))['x'].item()==1.0
+    imputer.reset()
+    assert np.isnan(imputer.transform(pd.DataFrame({'x': [np.nan]}))['x'].item())
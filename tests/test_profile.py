@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+from dalign import profile, verify
+
+def make_frame(rows=1000):
+    rng = np.random.default_rng(0)
+    times = pd.Series(pd.date_range('2020-01-01', periods=rows, freq='h')).where(rng.random(rows)>0.1)
+    return pd.DataFrame({'a': np.where(rng.random(rows)<0.1, np.nan, rng.normal(size=rows)),
+                         's': rng.choice(['x', 'y', None], rows),
+                         'b': rng.integers(0, 9, rows),
+                         't': times})
+
+def test_num_var_info_is_the_same_from_a_profile_and_in_parallel():
+    df = make_frame()
+    expected = verify.num_var_info(df)
+    assert list(expected.columns)==['a', 'b', 't']
+    pd.testing.assert_frame_equal(verify.num_var_info(df, n_jobs=2), expected)
+    pd.testing.assert_frame_equal(verify.num_var_info(df, prof=profile.profile(df)), expected)
+
+def test_num_var_info_without_datetime_columns():
+    df = make_frame().drop(columns='t')
+    expected = verify.num_var_info(df)
+    pd.testing.assert_frame_equal(verify.num_var_info(df, n_jobs=2), expected)
+    pd.testing.assert_frame_equal(verify.num_var_info(df, prof=profile.profile(df)), expected)